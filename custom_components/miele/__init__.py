@@ -4,60 +4,79 @@ Support for Miele.
 import asyncio
 import functools
 import logging
-from datetime import timedelta
-from importlib import import_module
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
-from aiohttp import web
-from homeassistant.components.http import HomeAssistantView
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import callback
-from homeassistant.helpers import network
-from homeassistant.helpers.discovery import load_platform
-from homeassistant.helpers.entity import Entity
+from homeassistant.exceptions import (
+    ConfigEntryAuthFailed,
+    HomeAssistantError,
+    ServiceValidationError,
+)
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_component import EntityComponent
-from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.helpers.network import get_url
-from homeassistant.helpers.storage import STORAGE_DIR
 
-from .miele_at_home import MieleClient, MieleOAuth
+from .const import (
+    CAPABILITIES,
+    CONF_BASE_URL,
+    CONF_CACHE_PATH,
+    CONF_CLIENT_ID,
+    CONF_CLIENT_SECRET,
+    CONF_INTERVAL,
+    CONF_LANG,
+    CONF_MAX_INTERVAL,
+    CONF_PUSH,
+    CONF_RATE_LIMIT,
+    CONF_RECONCILE_INTERVAL,
+    CONF_RECORD_PATH,
+    DATA_ACCOUNTS,
+    DATA_APPLIANCES,
+    DATA_CLIENT,
+    DATA_COMPONENT,
+    DATA_COORDINATOR,
+    DATA_DEVICE_OWNERS,
+    DATA_DEVICES,
+    DATA_EVENT_STREAM,
+    DATA_OAUTH,
+    DATA_PROGRAMS,
+    DATA_REGISTRY,
+    DATA_SCHEDULER,
+    DATA_TELEMETRY,
+    DEFAULT_INTERVAL,
+    DEFAULT_LANG,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RECONCILE_INTERVAL,
+    DOMAIN,
+)
+from .coordinator import MieleCoordinator
+from .entity import MieleEntity
+from .miele_at_home import (
+    DEFAULT_BASE_URL,
+    MieleClient,
+    MieleEventStream,
+    MieleOAuth,
+    MieleRequestError,
+    RateLimiter,
+)
+from .programs import MieleProgramCatalog
+from .registry import MieleEntityRegistry
+from .scheduler import MieleRefreshScheduler
+from .store import MieleDeviceStore, MieleEntryTokenStore, MieleProgramStore
+from .telemetry import MieleTelemetry
+from .traffic import MieleTrafficRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
-DEVICES = []
-
-DEFAULT_NAME = "Miele@home"
-DOMAIN = "miele"
-
-_CONFIGURING = {}
-
-DATA_OAUTH = "oauth"
-DATA_DEVICES = "devices"
-DATA_CLIENT = "client"
 SERVICE_ACTION = "action"
 SERVICE_START_PROGRAM = "start_program"
 SERVICE_STOP_PROGRAM = "stop_program"
-SCOPE = "code"
-DEFAULT_LANG = "en"
-DEFAULT_INTERVAL = 5
-AUTH_CALLBACK_PATH = "/api/miele/callback"
-AUTH_CALLBACK_NAME = "api:miele:callback"
-CONF_CLIENT_ID = "client_id"
-CONF_CLIENT_SECRET = "client_secret"
-CONF_LANG = "lang"
-CONF_CACHE_PATH = "cache_path"
-CONF_INTERVAL = "interval"
-CONFIGURATOR_LINK_NAME = "Link Miele account"
-CONFIGURATOR_SUBMIT_CAPTION = "I have authorized Miele@home."
-CONFIGURATOR_DESCRIPTION = (
-    "To link your Miele account, " "click the link, login, and authorize:"
-)
-CONFIGURATOR_DESCRIPTION_IMAGE = (
-    "https://api.mcs3.miele.com/assets/images/miele_logo.svg"
-)
-
-MIELE_COMPONENTS = ["binary_sensor", "light", "sensor", "fan"]
+SERVICE_REFRESH = "refresh"
+MIELE_COMPONENTS = ["binary_sensor", "light", "sensor", "fan", "select"]
 
+# The YAML configuration is imported into a config entry once.
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: vol.Schema(
@@ -67,540 +86,431 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional(CONF_LANG): cv.string,
                 vol.Optional(CONF_CACHE_PATH): cv.string,
                 vol.Optional(CONF_INTERVAL): cv.positive_int,
+                vol.Optional(CONF_MAX_INTERVAL): cv.positive_int,
+                vol.Optional(CONF_PUSH, default=False): cv.boolean,
+                vol.Optional(CONF_RECONCILE_INTERVAL): cv.positive_int,
+                vol.Optional(CONF_BASE_URL, default=DEFAULT_BASE_URL): cv.url,
+                vol.Optional(CONF_RECORD_PATH): cv.string,
+                vol.Optional(CONF_RATE_LIMIT, default=DEFAULT_RATE_LIMIT): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
             }
         ),
     },
     extra=vol.ALLOW_EXTRA,
 )
 
-CAPABILITIES = {
-    "1": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature.0",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-        "spinningSpeed",
-        "ecoFeedback.energyConsumption",
-        "ecoFeedback.waterConsumption",
-    ],
-    "2": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-        "dryingStep",
-        "ecoFeedback.energyConsumption",
-    ],
-    "7": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "signalInfo",
-        "signalFailure",
-        "remoteEnable",
-        "elapsedTime",
-        "ecoFeedback.energyConsumption",
-        "ecoFeedback.waterConsumption",
-    ],
-    "12": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-    ],
-    "13": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-    ],
-    "14": ["status", "signalFailure", "plateStep"],
-    "15": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-    ],
-    "16": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-    ],
-    "17": [
-        "ProgramID",
-        "status",
-        "programPhase",
-        "signalInfo",
-        "signalFailure",
-        "remoteEnable",
-    ],
-    "18": [
-        "status",
-        "signalInfo",
-        "signalFailure",
-        "remoteEnable",
-        "ventilationStep",
-    ],
-    "19": [
-        "status",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-    ],
-    "20": [
-        "status",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-    ],
-    "21": [
-        "status",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-    ],
-    "23": [
-        "ProgramID",
-        "status",
-        "programType",
-        "signalInfo",
-        "signalFailure",
-        "remoteEnable",
-        "batteryLevel",
-    ],
-    "24": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "targetTemperature.0",
-        "startTime",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-        "spinningSpeed",
-        "dryingStep",
-        "ecoFeedback.energyConsumption",
-        "ecoFeedback.waterConsumption",
-    ],
-    "25": [
-        "status",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "elapsedTime",
-    ],
-    "27": ["status", "signalFailure", "plateStep"],
-    "31": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-    ],
-    "32": [
-        "status",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-    ],
-    "33": [
-        "status",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-    ],
-    "34": [
-        "status",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-    ],
-    "45": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-    ],
-    "67": [
-        "ProgramID",
-        "status",
-        "programType",
-        "programPhase",
-        "remainingTime",
-        "startTime",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "signalDoor",
-        "remoteEnable",
-        "elapsedTime",
-    ],
-    "68": [
-        "status",
-        "targetTemperature",
-        "temperature",
-        "signalInfo",
-        "signalFailure",
-        "remoteEnable",
-    ],
-}
-
-
-def request_configuration(hass, config, oauth):
-    """Request Miele authorization."""
-
-    async def miele_configuration_callback(callback_data):
-        if not hass.data[DOMAIN][DATA_OAUTH].authorized:
-            configurator.async_notify_errors(
-                _CONFIGURING[DOMAIN], "Failed to register, please try again."
-            )
-            return
-
-        if DOMAIN in _CONFIGURING:
-            req_config = _CONFIGURING.pop(DOMAIN)
-            hass.components.configurator.async_request_done(req_config)
-
-        await async_setup(hass, config)
-
-    _LOGGER.info("Requesting authorization...")
-    configurator = hass.components.configurator
-    _CONFIGURING[DOMAIN] = configurator.async_request_config(
-        DEFAULT_NAME,
-        miele_configuration_callback,
-        link_name=CONFIGURATOR_LINK_NAME,
-        link_url=oauth.authorization_url,
-        description=CONFIGURATOR_DESCRIPTION,
-        description_image=CONFIGURATOR_DESCRIPTION_IMAGE,
-        submit_caption=CONFIGURATOR_SUBMIT_CAPTION,
-    )
-    return
-
 
 def create_sensor(client, hass, home_device, lang):
     return MieleDevice(hass, client, home_device, lang)
 
 
-def _to_dict(items):
-    # Replace with map()
-    result = {}
-    for item in items:
-        ident = item["ident"]
-        result[ident["deviceIdentLabel"]["fabNumber"]] = item
+def create_devices(client, lang, hass, home_device):
+    """Entity factory of the miele domain for the entity registry."""
+    return [create_sensor(client, hass, home_device, lang)]
 
-    return result
 
+def device_changed(changes, device_id, watched_keys):
+    """Check whether an entity watching watched_keys of a device has to refresh."""
+    if device_id not in changes:
+        return False
 
-async def async_setup(hass, config):
-    """Set up the Miele platform."""
-
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
+    changed = changes[device_id]
+    if changed is None or watched_keys is None:
+        return True
 
-    if DATA_OAUTH not in hass.data[DOMAIN]:
-        callback_url = "{}{}".format(
-            network.get_url(hass, allow_external=True, prefer_external=True),
-            AUTH_CALLBACK_PATH,
-        )
-        cache = config[DOMAIN].get(
-            CONF_CACHE_PATH, hass.config.path(STORAGE_DIR, f".miele-token-cache")
-        )
-        hass.data[DOMAIN][DATA_OAUTH] = MieleOAuth(
-            hass,
-            config[DOMAIN].get(CONF_CLIENT_ID),
-            config[DOMAIN].get(CONF_CLIENT_SECRET),
-            redirect_uri=callback_url,
-            cache_path=cache,
-        )
+    return not changed.isdisjoint(watched_keys)
 
-    if not hass.data[DOMAIN][DATA_OAUTH].authorized:
-        _LOGGER.info("no token; requesting authorization")
-        hass.http.register_view(
-            MieleAuthCallbackView(config, hass.data[DOMAIN][DATA_OAUTH])
-        )
-        request_configuration(hass, config, hass.data[DOMAIN][DATA_OAUTH])
-        return True
 
-    lang = config[DOMAIN].get(CONF_LANG, DEFAULT_LANG)
+@callback
+def _update_entities(hass, account, changes):
+    """Push changed appliances to their entities, returns how many were updated."""
+    if not changes:
+        return 0
 
-    component = EntityComponent(_LOGGER, DOMAIN, hass)
+    registry = account[DATA_REGISTRY]
+    _reconcile_appliances(hass, account, changes)
 
-    client = MieleClient(hass, hass.data[DOMAIN][DATA_OAUTH])
-    hass.data[DOMAIN][DATA_CLIENT] = client
-    data_get_devices = await client.get_devices(lang)
-    hass.data[DOMAIN][DATA_DEVICES] = _to_dict(data_get_devices)
+    updated = 0
+    appliances = account[DATA_APPLIANCES]
+    for device_id in changes:
+        appliance = appliances.get(device_id)
+        for entity in registry.device_entities(device_id).values():
+            if not device_changed(changes, device_id, entity._watched_keys):
+                continue
 
-    DEVICES.extend(
-        [
-            create_sensor(client, hass, home_device, lang)
-            for k, home_device in hass.data[DOMAIN][DATA_DEVICES].items()
-        ]
-    )
-    await component.async_add_entities(DEVICES, False)
-
-    for component in MIELE_COMPONENTS:
-        load_platform(hass, component, DOMAIN, {}, config)
-
-    async def refresh_devices(event_time):
-        _LOGGER.debug("Attempting to update Miele devices")
-        try:
-            device_state = await client.get_devices(lang)
-        except:
-            device_state = None
-        if device_state is None:
-            _LOGGER.error("Did not receive Miele devices")
-        else:
-            hass.data[DOMAIN][DATA_DEVICES] = _to_dict(device_state)
-            for device in DEVICES:
-                device.async_schedule_update_ha_state(True)
-
-            for component in MIELE_COMPONENTS:
-                platform = import_module(".{}".format(component), __name__)
-                platform.update_device_state()
+            try:
+                entity.async_update_appliance(appliance)
+                updated += 1
+            except (AssertionError, AttributeError):
+                _LOGGER.debug(
+                    "Component most likely is disabled manually, if not please report to developer"
+                    "{}".format(entity.entity_id)
+                )
 
-    register_services(hass)
-    interval = timedelta(seconds=config[DOMAIN].get(CONF_INTERVAL, DEFAULT_INTERVAL))
+    return updated
+
+
+@callback
+def _reconcile_appliances(hass, account, changes):
+    """Create entities for new appliances and remove those of vanished ones."""
+    # Appliances only appear or vanish with a full refresh of their entities.
+    candidates = [
+        device_id for device_id, changed in changes.items() if changed is None
+    ]
+    if not candidates:
+        return
+
+    registry = account[DATA_REGISTRY]
+    appliances = account[DATA_APPLIANCES]
+    known = registry.device_ids
+    removed = [
+        device_id
+        for device_id in candidates
+        if device_id in known and device_id not in appliances
+    ]
+    added = [
+        appliances[device_id]
+        for device_id in candidates
+        if device_id in appliances and device_id not in known
+    ]
+
+    if removed:
+        _LOGGER.info("Miele appliances removed: {}".format(", ".join(removed)))
+        for entity in registry.async_remove_appliances(removed):
+            if entity.hass is not None:
+                hass.async_create_task(entity.async_remove())
+
+    if added:
+        _LOGGER.info(
+            "Miele appliances discovered: {}".format(
+                ", ".join(device.device_id for device in added)
+            )
+        )
+        registry.async_add_appliances(added)
 
-    async_track_time_interval(hass, refresh_devices, interval)
 
-    return True
+async def async_setup(hass, config):
+    """Set up the Miele component, the accounts are config entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    data[DATA_ACCOUNTS] = {}
+    # fabNumbers of appliances and the account that created their entities.
+    data[DATA_DEVICE_OWNERS] = {}
+    # Appliances themselves are entities of the miele domain.
+    data[DATA_COMPONENT] = EntityComponent(_LOGGER, DOMAIN, hass)
+
+    # One scheduler spreads the polls of all accounts.
+    scheduler = MieleRefreshScheduler(hass)
+    data[DATA_SCHEDULER] = scheduler
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, scheduler.stop)
+
+    # Program catalogs are shared by the appliances of all accounts.
+    catalog = MieleProgramCatalog(hass, MieleProgramStore(hass))
+    await catalog.async_load()
+    data[DATA_PROGRAMS] = catalog
 
+    register_services(hass)
 
-def register_services(hass):
-    """Register all services for Miele devices."""
-    hass.services.async_register(DOMAIN, SERVICE_ACTION, _action_service)
-    hass.services.async_register(DOMAIN, SERVICE_START_PROGRAM, _action_start_program)
-    hass.services.async_register(DOMAIN, SERVICE_STOP_PROGRAM, _action_stop_program)
+    if DOMAIN in config:
+        hass.async_create_task(
+            hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": SOURCE_IMPORT}, data=config[DOMAIN]
+            )
+        )
 
+    return True
 
-async def _apply_service(service, service_func, *service_func_args):
-    entity_ids = service.data.get("entity_id")
 
-    _devices = []
-    if entity_ids:
-        _devices.extend(
-            [device for device in DEVICES if device.entity_id in entity_ids]
+async def async_setup_entry(hass, entry):
+    """Set up the Miele account of a config entry."""
+    data = hass.data[DOMAIN]
+    client_id = entry.data[CONF_CLIENT_ID]
+    if entry.unique_id is None and not any(
+        other.unique_id == client_id
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        # Entries linked before the client id became their unique id.
+        hass.config_entries.async_update_entry(entry, unique_id=client_id)
+
+    account = {}
+    options = entry.options
+    base_url = entry.data[CONF_BASE_URL]
+    rate_limiter = RateLimiter(options.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT) / 3600)
+
+    oauth = MieleOAuth(
+        hass,
+        entry.data[CONF_CLIENT_ID],
+        entry.data[CONF_CLIENT_SECRET],
+        redirect_uri=None,
+        store=MieleEntryTokenStore(hass, entry),
+        base_url=base_url,
+        on_auth_failed=functools.partial(entry.async_start_reauth, hass),
+        rate_limiter=rate_limiter,
+    )
+    await oauth.async_load_token()
+    if not oauth.authorized:
+        raise ConfigEntryAuthFailed("Miele@home is not authorized")
+    account[DATA_OAUTH] = oauth
+
+    lang = options.get(CONF_LANG, DEFAULT_LANG)
+
+    recorder = None
+    if options.get(CONF_RECORD_PATH):
+        recorder = MieleTrafficRecorder(hass, options[CONF_RECORD_PATH])
+    telemetry = MieleTelemetry()
+    account[DATA_TELEMETRY] = telemetry
+    client = MieleClient(
+        hass,
+        oauth,
+        async_get_clientsession(hass),
+        base_url,
+        recorder,
+        telemetry,
+        rate_limiter,
+    )
+    account[DATA_CLIENT] = client
+    account[DATA_DEVICES] = {}
+    account[DATA_APPLIANCES] = {}
+    registry = MieleEntityRegistry(
+        hass, account, entry.entry_id, data[DATA_DEVICE_OWNERS]
+    )
+    account[DATA_REGISTRY] = registry
+    snapshot_store = MieleDeviceStore(hass, entry.entry_id)
+    coordinator = MieleCoordinator(
+        hass,
+        account,
+        client,
+        lang,
+        functools.partial(_update_entities, hass, account),
+        snapshot_store,
+        telemetry,
+    )
+    account[DATA_COORDINATOR] = coordinator
+    data[DATA_ACCOUNTS][entry.entry_id] = account
+
+    snapshot = await snapshot_store.async_load()
+    if snapshot:
+        # Create the entities right away and reconcile them in the background.
+        coordinator.async_restore(snapshot)
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "miele refresh"
         )
+    else:
+        await coordinator.async_refresh()
+
+    component = data[DATA_COMPONENT]
+    registry.async_add_platform(
+        DOMAIN,
+        functools.partial(create_devices, client, lang),
+        lambda entities: hass.async_create_task(
+            component.async_add_entities(entities, False)
+        ),
+    )
+    await hass.config_entries.async_forward_entry_setups(entry, MIELE_COMPONENTS)
 
-    device_ids = service.data.get("device_id")
-    if device_ids:
-        _devices.extend(
-            [device for device in DEVICES if device.unique_id in device_ids]
+    if options.get(CONF_PUSH):
+        # The event stream delivers every change, polling only reconciles.
+        min_interval = max_interval = options.get(
+            CONF_RECONCILE_INTERVAL, DEFAULT_RECONCILE_INTERVAL
         )
+        stream = MieleEventStream(
+            hass,
+            oauth,
+            async_get_clientsession(hass),
+            lang,
+            coordinator.async_devices_event,
+            coordinator.async_actions_event,
+            base_url,
+            rate_limiter,
+        )
+        account[DATA_EVENT_STREAM] = stream
+        stream.start()
+        entry.async_on_unload(stream.stop)
+        entry.async_on_unload(
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stream.stop)
+        )
+    else:
+        min_interval = options.get(CONF_INTERVAL, DEFAULT_INTERVAL)
+        max_interval = options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL)
+
+    entry.async_on_unload(
+        data[DATA_SCHEDULER].add_account(
+            entry.entry_id,
+            coordinator.async_refresh,
+            lambda: coordinator.appliances,
+            min_interval,
+            max_interval,
+            client.rate_limiter,
+        )
+    )
 
-    for device in _devices:
-        await service_func(device, *service_func_args)
-
+    setup_options = dict(options)
 
-async def _action_service(service):
-    body = service.data.get("body")
-    await _apply_service(service, MieleDevice.action, body)
+    async def async_entry_updated(hass, entry):
+        # Token refreshes update the entry as well, only new options reload it.
+        if dict(entry.options) != setup_options:
+            await hass.config_entries.async_reload(entry.entry_id)
 
+    entry.async_on_unload(entry.add_update_listener(async_entry_updated))
 
-async def _action_start_program(service):
-    program_id = service.data.get("program_id")
-    await _apply_service(service, MieleDevice.start_program, program_id)
+    return True
 
 
-async def _action_stop_program(service):
-    body = {"processAction": 2}
-    await _apply_service(service, MieleDevice.action, body)
+async def async_unload_entry(hass, entry):
+    """Unload the Miele account of a config entry."""
+    if not await hass.config_entries.async_unload_platforms(entry, MIELE_COMPONENTS):
+        return False
 
+    # The platform entities are gone, the appliance entities remain.
+    account = hass.data[DOMAIN][DATA_ACCOUNTS].pop(entry.entry_id)
+    for entity in account[DATA_REGISTRY].async_unload():
+        if entity.hass is not None:
+            await entity.async_remove()
 
-class MieleAuthCallbackView(HomeAssistantView):
-    """Miele Authorization Callback View."""
+    return True
 
-    requires_auth = False
-    url = AUTH_CALLBACK_PATH
-    name = AUTH_CALLBACK_NAME
 
-    def __init__(self, config, oauth):
-        """Initialize."""
-        self.config = config
-        self.oauth = oauth
+async def async_remove_entry(hass, entry):
+    """Forget the device snapshot of a removed Miele account."""
+    await MieleDeviceStore(hass, entry.entry_id).async_remove()
 
-    @callback
-    async def get(self, request):
-        """Receive authorization token."""
-        hass = request.app["hass"]
 
-        from oauthlib.oauth2.rfc6749.errors import (
-            MismatchingStateError,
-            MissingTokenError,
+def register_services(hass):
+    """Register all services for Miele devices."""
+    for service, handler in (
+        (SERVICE_ACTION, _action_service),
+        (SERVICE_START_PROGRAM, _action_start_program),
+        (SERVICE_STOP_PROGRAM, _action_stop_program),
+        (SERVICE_REFRESH, _refresh_service),
+    ):
+        hass.services.async_register(DOMAIN, service, functools.partial(handler, hass))
+
+
+def _service_targets(hass, service):
+    """Return the accounts targeted by a service call and their fabNumbers."""
+    entity_ids = cv.ensure_list(service.data.get("entity_id"))
+    device_ids = [
+        str(device_id) for device_id in cv.ensure_list(service.data.get("device_id"))
+    ]
+
+    targets = {}
+    for account_id, account in hass.data[DOMAIN][DATA_ACCOUNTS].items():
+        account_device_ids = account[DATA_REGISTRY].resolve_device_ids(
+            entity_ids, device_ids
         )
+        if account_device_ids:
+            targets[account_id] = account_device_ids
 
-        response_message = """Miele@home has been successfully authorized!
-        You can close this window now!"""
+    return targets
 
-        result = None
-        if request.query.get("code") is not None:
-            try:
-                func = functools.partial(
-                    self.oauth.get_access_token, request.query["code"]
+
+async def _apply_service(hass, service, service_func, *service_func_args):
+    accounts = hass.data[DOMAIN][DATA_ACCOUNTS]
+    try:
+        await asyncio.gather(
+            *[
+                service_func(
+                    accounts[account_id][DATA_CLIENT], device_id, *service_func_args
                 )
+                for account_id, device_ids in _service_targets(hass, service).items()
+                for device_id in device_ids
+            ]
+        )
+    except MieleRequestError as err:
+        raise HomeAssistantError(str(err)) from err
 
-                result = await hass.async_add_executor_job(func)
-            except MissingTokenError as error:
-                _LOGGER.error("Missing token: %s", error)
-                response_message = """Something went wrong when
-                attempting authenticating with Miele@home. The error
-                encountered was {}. Please try again!""".format(
-                    error
+
+async def _action_service(hass, service):
+    body = service.data.get("body")
+    await _apply_service(hass, service, MieleClient.action, body)
+
+
+async def _action_start_program(hass, service):
+    program_id = service.data.get("program_id")
+    _validate_program(hass, service, program_id)
+    await _apply_service(hass, service, MieleClient.start_program, program_id)
+
+
+@callback
+def _validate_program(hass, service, program_id):
+    """Reject a program missing from the cached catalog of a targeted appliance.
+
+    Missing or expired catalogs are fetched in the background, the start is
+    never held up by a catalog request.
+    """
+    try:
+        program_id = int(program_id)
+    except (TypeError, ValueError):
+        program_id = None
+
+    accounts = hass.data[DOMAIN][DATA_ACCOUNTS]
+    catalog = hass.data[DOMAIN][DATA_PROGRAMS]
+    for account_id, device_ids in _service_targets(hass, service).items():
+        account = accounts[account_id]
+        for device_id in device_ids:
+            device = account[DATA_APPLIANCES].get(device_id)
+            if device is None:
+                continue
+
+            lang = account[DATA_COORDINATOR].lang
+            if not catalog.is_fresh(device, lang):
+                hass.async_create_task(
+                    catalog.async_get(account[DATA_CLIENT], device, lang)
                 )
-            except MismatchingStateError as error:
-                _LOGGER.error("Mismatched state, CSRF error: %s", error)
-                response_message = """Something went wrong when
-                attempting authenticating with Miele@home. The error
-                encountered was {}. Please try again!""".format(
-                    error
+
+            # Appliances without a catalog are left to the Miele cloud.
+            programs = catalog.programs(device, lang)
+            if programs is not None and program_id not in programs:
+                raise ServiceValidationError(
+                    "Program {} is not available on {}, available are: {}".format(
+                        service.data.get("program_id"),
+                        device.name,
+                        ", ".join(
+                            "{} ({})".format(name, available_id)
+                            for available_id, name in programs.items()
+                        ),
+                    )
                 )
-        else:
-            _LOGGER.error("Unknown error when authorizing")
-            response_message = """Something went wrong when
-                attempting authenticating with Miele@home.
-                An unknown error occurred. Please try again!
-                """
-
-        html_response = """<html><head><title>Miele@home Auth</title></head>
-        <body><h1>{}</h1></body></html>""".format(
-            response_message
-        )
 
-        response = web.Response(
-            body=html_response, content_type="text/html", status=200, headers=None
-        )
-        response.enable_compression()
 
-        return response
+async def _action_stop_program(hass, service):
+    body = {"processAction": 2}
+    await _apply_service(hass, service, MieleClient.action, body)
+
+
+async def _refresh_service(hass, service):
+    account_ids = None
+    if service.data.get("entity_id") or service.data.get("device_id"):
+        account_ids = list(_service_targets(hass, service))
+
+    await hass.data[DOMAIN][DATA_SCHEDULER].async_refresh_now(account_ids)
 
 
-class MieleDevice(Entity):
+class MieleDevice(MieleEntity):
     def __init__(self, hass, client, home_device, lang):
         self._hass = hass
         self._client = client
-        self._home_device = home_device
+        self._device = home_device
         self._lang = lang
+        self._watched_keys = {"status"}
 
     @property
     def unique_id(self):
         """Return the unique ID for this sensor."""
-        return self._home_device["ident"]["deviceIdentLabel"]["fabNumber"]
+        return self.device_id
 
     @property
     def name(self):
         """Return the name of the sensor."""
-
-        ident = self._home_device["ident"]
-
-        result = ident["deviceName"]
-        if len(result) == 0:
-            result = ident["type"]["value_localized"]
-
-        return result
+        return self._device.name
 
     @property
     def state(self):
         """Return the state of the sensor."""
-
-        result = self._home_device["state"]["status"]["value_localized"]
+        status = self._device.value("status")
+        result = status.localized
         if result == None:
-            result = self._home_device["state"]["status"]["value_raw"]
+            result = status.raw
 
         return result
 
@@ -609,18 +519,14 @@ class MieleDevice(Entity):
         """Attributes."""
 
         result = {}
-        result["state_raw"] = self._home_device["state"]["status"]["value_raw"]
+        result["state_raw"] = self._device.status
 
-        result["model"] = self._home_device["ident"]["deviceIdentLabel"]["techType"]
-        result["device_type"] = self._home_device["ident"]["type"]["value_localized"]
-        result["fabrication_number"] = self._home_device["ident"]["deviceIdentLabel"][
-            "fabNumber"
-        ]
+        result["model"] = self._device.tech_type
+        result["device_type"] = self._device.type_name
+        result["fabrication_number"] = self._device.device_id
 
-        result["gateway_type"] = self._home_device["ident"]["xkmIdentLabel"]["techType"]
-        result["gateway_version"] = self._home_device["ident"]["xkmIdentLabel"][
-            "releaseVersion"
-        ]
+        result["gateway_type"] = self._device.gateway_type
+        result["gateway_version"] = self._device.gateway_version
 
         return result
 
@@ -629,9 +535,3 @@ class MieleDevice(Entity):
 
     async def start_program(self, program_id):
         await self._client.start_program(self.unique_id, program_id)
-
-    async def async_update(self):
-        if not self.unique_id in self._hass.data[DOMAIN][DATA_DEVICES]:
-            _LOGGER.debug("Miele device not found: {}".format(self.unique_id))
-        else:
-            self._home_device = self._hass.data[DOMAIN][DATA_DEVICES][self.unique_id]
@@ -1,24 +1,21 @@
+import functools
 import logging
-from datetime import timedelta
 
+from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
 from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.helpers.entity import Entity
 
-from custom_components.miele import CAPABILITIES, DATA_DEVICES
+from custom_components.miele import DATA_ACCOUNTS, DATA_REGISTRY
 from custom_components.miele import DOMAIN as MIELE_DOMAIN
-
-PLATFORMS = ["miele"]
+from custom_components.miele.descriptors import (
+    MieleEntityDescriptor,
+    compile_descriptors,
+    create_entities,
+    single_entity,
+)
+from custom_components.miele.entity import MieleEntity
 
 _LOGGER = logging.getLogger(__name__)
 
-ALL_DEVICES = []
-
-
-def state_capability(type, state):
-    type_str = str(type)
-    if state in CAPABILITIES[type_str]:
-        return True
-
 
 def _map_key(key):
     if key == "signalInfo":
@@ -32,63 +29,24 @@ def _map_key(key):
 
 
 # pylint: disable=W0612
-def setup_platform(hass, config, add_devices, discovery_info=None):
-    global ALL_DEVICES
-
-    devices = hass.data[MIELE_DOMAIN][DATA_DEVICES]
-    for k, device in devices.items():
-        device_state = device["state"]
-        device_type = device["ident"]["type"]["value_raw"]
-
-        binary_devices = []
-        if "signalInfo" in device_state and state_capability(
-            type=device_type, state="signalInfo"
-        ):
-            binary_devices.append(MieleBinarySensor(hass, device, "signalInfo"))
-        if "signalFailure" in device_state and state_capability(
-            type=device_type, state="signalFailure"
-        ):
-            binary_devices.append(MieleBinarySensor(hass, device, "signalFailure"))
-        if "signalDoor" in device_state and state_capability(
-            type=device_type, state="signalDoor"
-        ):
-            binary_devices.append(MieleBinarySensor(hass, device, "signalDoor"))
-        if "remoteEnable" in device_state and state_capability(
-            type=device_type, state="remoteEnable"
-        ):
-            remote_state = device_state["remoteEnable"]
-            if "mobileStart" in remote_state:
-                binary_devices.append(
-                    MieleBinarySensor(hass, device, "remoteEnable.mobileStart")
-                )
-
-        add_devices(binary_devices)
-        ALL_DEVICES = ALL_DEVICES + binary_devices
-
-
-def update_device_state():
-    for device in ALL_DEVICES:
-        try:
-            device.async_schedule_update_ha_state(True)
-        except (AssertionError, AttributeError):
-            _LOGGER.debug(
-                "Component most likely is disabled manually, if not please report to developer"
-                "{}".format(device.entity_id)
-            )
-
-
-class MieleBinarySensor(BinarySensorEntity):
+async def async_setup_entry(hass, entry, async_add_entities):
+    account = hass.data[MIELE_DOMAIN][DATA_ACCOUNTS][entry.entry_id]
+    account[DATA_REGISTRY].async_add_platform(
+        BINARY_SENSOR_DOMAIN,
+        functools.partial(create_entities, BINARY_SENSOR_DESCRIPTORS),
+        async_add_entities,
+    )
+
+
+class MieleBinarySensor(MieleEntity, BinarySensorEntity):
     def __init__(self, hass, device, key):
         self._hass = hass
         self._device = device
+        self._path = key
         self._keys = key.split(".")
         self._key = self._keys[-1]
         self._ha_key = _map_key(self._key)
-
-    @property
-    def device_id(self):
-        """Return the unique ID for this sensor."""
-        return self._device["ident"]["deviceIdentLabel"]["fabNumber"]
+        self._watched_keys = {self._keys[0]}
 
     @property
     def unique_id(self):
@@ -98,21 +56,12 @@ class MieleBinarySensor(BinarySensorEntity):
     @property
     def name(self):
         """Return the name of the sensor."""
-        ident = self._device["ident"]
-
-        result = ident["deviceName"]
-        if len(result) == 0:
-            return ident["type"]["value_localized"] + " " + self._ha_key
-        else:
-            return result + " " + self._ha_key
+        return self._device.name + " " + self._ha_key
 
     @property
     def is_on(self):
         """Return the state of the sensor."""
-        current_val = self._device["state"]
-        for k in self._keys:
-            current_val = current_val[k]
-        return bool(current_val)
+        return self._device.signals.get(self._path, False)
 
     @property
     def device_class(self):
@@ -123,8 +72,27 @@ class MieleBinarySensor(BinarySensorEntity):
         else:
             return "problem"
 
-    async def async_update(self):
-        if not self.device_id in self._hass.data[MIELE_DOMAIN][DATA_DEVICES]:
-            _LOGGER.debug("Miele device not found: {}".format(self.device_id))
-        else:
-            self._device = self._hass.data[MIELE_DOMAIN][DATA_DEVICES][self.device_id]
+
+def _mobile_start_sensor(hass, device):
+    if "remoteEnable.mobileStart" in device.signals:
+        return [MieleBinarySensor(hass, device, "remoteEnable.mobileStart")]
+
+    return []
+
+
+BINARY_SENSOR_DESCRIPTORS = compile_descriptors(
+    (
+        MieleEntityDescriptor(
+            "signalInfo", "signalInfo", single_entity(MieleBinarySensor, "signalInfo")
+        ),
+        MieleEntityDescriptor(
+            "signalFailure",
+            "signalFailure",
+            single_entity(MieleBinarySensor, "signalFailure"),
+        ),
+        MieleEntityDescriptor(
+            "signalDoor", "signalDoor", single_entity(MieleBinarySensor, "signalDoor")
+        ),
+        MieleEntityDescriptor("remoteEnable", "remoteEnable", _mobile_start_sensor),
+    )
+)
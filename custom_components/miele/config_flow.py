@@ -0,0 +1,285 @@
+"""
+Config flow for Miele.
+"""
+import logging
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from aiohttp import web
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.const import CONF_NAME
+from homeassistant.core import callback
+from homeassistant.helpers import network
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import (
+    AUTH_CALLBACK_NAME,
+    AUTH_CALLBACK_PATH,
+    CONF_BASE_URL,
+    CONF_CACHE_PATH,
+    CONF_CLIENT_ID,
+    CONF_CLIENT_SECRET,
+    CONF_INTERVAL,
+    CONF_LANG,
+    CONF_MAX_INTERVAL,
+    CONF_PUSH,
+    CONF_RATE_LIMIT,
+    CONF_RECONCILE_INTERVAL,
+    CONF_RECORD_PATH,
+    CONF_TOKEN,
+    DATA_CALLBACK_VIEW,
+    DEFAULT_ACCOUNT_NAME,
+    DEFAULT_INTERVAL,
+    DEFAULT_LANG,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RECONCILE_INTERVAL,
+    DOMAIN,
+)
+from .miele_at_home import DEFAULT_BASE_URL, MieleOAuth
+from .store import MieleLegacyTokenStore
+
+_LOGGER = logging.getLogger(__name__)
+
+USER_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME, default=DEFAULT_ACCOUNT_NAME): cv.string,
+        vol.Required(CONF_CLIENT_ID): cv.string,
+        vol.Required(CONF_CLIENT_SECRET): cv.string,
+        vol.Required(CONF_BASE_URL, default=DEFAULT_BASE_URL): cv.url,
+    }
+)
+
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_LANG, default=DEFAULT_LANG): cv.string,
+        vol.Optional(CONF_INTERVAL, default=DEFAULT_INTERVAL): cv.positive_int,
+        vol.Optional(CONF_MAX_INTERVAL, default=DEFAULT_MAX_INTERVAL): cv.positive_int,
+        vol.Optional(CONF_PUSH, default=False): cv.boolean,
+        vol.Optional(
+            CONF_RECONCILE_INTERVAL, default=DEFAULT_RECONCILE_INTERVAL
+        ): cv.positive_int,
+        vol.Optional(CONF_RATE_LIMIT, default=DEFAULT_RATE_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(CONF_RECORD_PATH): cv.string,
+    }
+)
+
+# Settings of the YAML configuration that are options of the config entry.
+OPTION_KEYS = (
+    CONF_LANG,
+    CONF_INTERVAL,
+    CONF_MAX_INTERVAL,
+    CONF_PUSH,
+    CONF_RECONCILE_INTERVAL,
+    CONF_RATE_LIMIT,
+    CONF_RECORD_PATH,
+)
+
+
+def callback_url(hass):
+    """Return the redirect URI Miele sends the authorization code to."""
+    return "{}{}".format(
+        network.get_url(hass, allow_external=True, prefer_external=True),
+        AUTH_CALLBACK_PATH,
+    )
+
+
+@callback
+def async_register_callback_view(hass):
+    """Register the view receiving the authorization code, once."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if data.get(DATA_CALLBACK_VIEW):
+        return
+
+    hass.http.register_view(MieleAuthCallbackView())
+    data[DATA_CALLBACK_VIEW] = True
+
+
+class MieleAuthCallbackView(HomeAssistantView):
+    """Miele Authorization Callback View."""
+
+    requires_auth = False
+    url = AUTH_CALLBACK_PATH
+    name = AUTH_CALLBACK_NAME
+
+    async def get(self, request):
+        """Hand the authorization code to the config flow named by state."""
+        hass = request.app["hass"]
+
+        response_message = """Miele@home has been successfully authorized!
+        You can close this window now!"""
+
+        flow_id = request.query.get("state")
+        try:
+            if flow_id is None:
+                raise data_entry_flow.UnknownFlow
+            await hass.config_entries.flow.async_configure(
+                flow_id=flow_id, user_input={"code": request.query.get("code")}
+            )
+        except data_entry_flow.UnknownFlow:
+            _LOGGER.error("Miele authorization for unknown flow %s", flow_id)
+            response_message = """Something went wrong when
+                attempting authenticating with Miele@home.
+                The authorization has expired. Please try again!
+                """
+
+        html_response = """<html><head><title>Miele@home Auth</title></head>
+        <body><h1>{}</h1><script>window.close()</script></body></html>""".format(
+            response_message
+        )
+
+        return web.Response(body=html_response, content_type="text/html")
+
+
+class MieleConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """
+    Links a Miele account, one config entry per account.
+
+    The user names the account, enters the client id and secret of their
+    Miele developer account and logs in to Miele in an external step. Miele
+    redirects to the callback view with the flow id as state, which resumes
+    the flow with the authorization code. The client id is the unique id of
+    the entry, a client can be linked once.
+    """
+
+    VERSION = 1
+
+    def __init__(self):
+        self._name = DEFAULT_ACCOUNT_NAME
+        self._data = {}
+        self._options = {}
+        self._oauth = None
+        self._token = None
+        self._legacy_store = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return MieleOptionsFlow()
+
+    async def async_step_user(self, user_input=None):
+        errors = {}
+        if user_input is not None:
+            self._name = user_input.pop(CONF_NAME)
+            await self.async_set_unique_id(user_input[CONF_CLIENT_ID])
+            self._abort_if_unique_id_configured()
+            if any(
+                entry.title == self._name for entry in self._async_current_entries()
+            ):
+                errors[CONF_NAME] = "name_exists"
+            else:
+                self._data = user_input
+                return await self.async_step_auth()
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=USER_SCHEMA,
+            errors=errors,
+            description_placeholders={"callback_url": callback_url(self.hass)},
+        )
+
+    async def async_step_import(self, import_config):
+        """Migrate the YAML configuration and the token authorized with it."""
+        await self.async_set_unique_id(import_config[CONF_CLIENT_ID])
+        self._abort_if_unique_id_configured()
+
+        cache = import_config.get(
+            CONF_CACHE_PATH, self.hass.config.path(STORAGE_DIR, ".miele-token-cache")
+        )
+        self._legacy_store = MieleLegacyTokenStore(self.hass, cache)
+        token = await self._legacy_store.async_load()
+        if token is None:
+            _LOGGER.warning(
+                "Miele is configured in configuration.yaml but was never "
+                "authorized, add the Miele integration in the UI instead"
+            )
+            return self.async_abort(reason="missing_token")
+
+        self._data = {
+            key: import_config[key]
+            for key in (CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_BASE_URL)
+        }
+        self._options = {
+            key: import_config[key] for key in OPTION_KEYS if key in import_config
+        }
+        self._token = token
+        return await self.async_step_finish()
+
+    async def async_step_reauth(self, entry_data):
+        self._data = {
+            key: entry_data[key]
+            for key in (CONF_CLIENT_ID, CONF_CLIENT_SECRET, CONF_BASE_URL)
+        }
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(self, user_input=None):
+        if user_input is None:
+            return self.async_show_form(step_id="reauth_confirm")
+
+        return await self.async_step_auth()
+
+    async def async_step_auth(self, user_input=None):
+        """Send the user to the Miele login and receive the authorization code."""
+        if user_input is None:
+            async_register_callback_view(self.hass)
+            self._oauth = MieleOAuth(
+                self.hass,
+                self._data[CONF_CLIENT_ID],
+                self._data[CONF_CLIENT_SECRET],
+                redirect_uri=callback_url(self.hass),
+                store=None,
+                base_url=self._data[CONF_BASE_URL],
+            )
+            return self.async_external_step(
+                step_id="auth", url=self._oauth.authorization_url(self.flow_id)
+            )
+
+        from oauthlib.oauth2.rfc6749.errors import OAuth2Error
+
+        code = user_input.get("code")
+        if code is not None:
+            try:
+                self._token = await self.hass.async_add_executor_job(
+                    self._oauth.get_access_token, code
+                )
+            except OAuth2Error as error:
+                _LOGGER.error("Failed to authorize Miele@home: %s", error)
+
+        return self.async_external_step_done(next_step_id="finish")
+
+    async def async_step_finish(self, user_input=None):
+        if self._token is None:
+            return self.async_abort(reason="authorize_failed")
+
+        data = dict(self._data, **{CONF_TOKEN: self._token})
+        if self.source == config_entries.SOURCE_REAUTH:
+            return self.async_update_reload_and_abort(
+                self._get_reauth_entry(), data=data
+            )
+
+        result = self.async_create_entry(
+            title=self._name, data=data, options=self._options
+        )
+        if self._legacy_store is not None:
+            # The imported token lives in the entry now.
+            await self._legacy_store.async_remove()
+
+        return result
+
+
+class MieleOptionsFlow(config_entries.OptionsFlow):
+    """Changes the polling and language settings, the entry reloads after."""
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, self.config_entry.options
+            ),
+        )
@@ -0,0 +1,344 @@
+"""
+Constants for the Miele integration.
+"""
+
+DOMAIN = "miele"
+
+DEFAULT_ACCOUNT_NAME = "Miele"
+
+CONF_CLIENT_ID = "client_id"
+CONF_CLIENT_SECRET = "client_secret"
+CONF_BASE_URL = "base_url"
+CONF_TOKEN = "token"
+CONF_LANG = "lang"
+CONF_CACHE_PATH = "cache_path"
+CONF_INTERVAL = "interval"
+CONF_MAX_INTERVAL = "max_interval"
+CONF_PUSH = "push"
+CONF_RECONCILE_INTERVAL = "reconcile_interval"
+CONF_RECORD_PATH = "record_path"
+CONF_RATE_LIMIT = "rate_limit"
+
+DEFAULT_LANG = "en"
+DEFAULT_INTERVAL = 5
+DEFAULT_MAX_INTERVAL = 60
+DEFAULT_RECONCILE_INTERVAL = 600
+DEFAULT_RATE_LIMIT = 1000
+
+AUTH_CALLBACK_PATH = "/api/miele/callback"
+AUTH_CALLBACK_NAME = "api:miele:callback"
+
+DATA_ACCOUNTS = "accounts"
+DATA_OAUTH = "oauth"
+DATA_PROGRAMS = "programs"
+DATA_DEVICES = "devices"
+DATA_DEVICE_OWNERS = "device_owners"
+DATA_APPLIANCES = "appliances"
+DATA_CALLBACK_VIEW = "callback_view"
+DATA_CLIENT = "client"
+DATA_COMPONENT = "component"
+DATA_COORDINATOR = "coordinator"
+DATA_EVENT_STREAM = "event_stream"
+DATA_REGISTRY = "registry"
+DATA_SCHEDULER = "scheduler"
+DATA_TELEMETRY = "telemetry"
+
+# https://www.miele.com/developer/swagger-ui/swagger.html#/
+STATUS_OFF = 1
+STATUS_ON = 2
+STATUS_PROGRAMMED = 3
+STATUS_PROGRAMMED_WAITING_TO_START = 4
+STATUS_RUNNING = 5
+STATUS_PAUSE = 6
+STATUS_END_PROGRAMMED = 7
+STATUS_FAILURE = 8
+STATUS_PROGRAMME_INTERRUPTED = 9
+STATUS_IDLE = 10
+STATUS_RINSE_HOLD = 11
+STATUS_SERVICE = 12
+STATUS_SUPERFREEZING = 13
+STATUS_SUPERCOOLING = 14
+STATUS_SUPERHEATING = 15
+STATUS_SUPERCOOLING_SUPERFREEZING = 146
+STATUS_NOT_CONNECTED = 255
+
+RUNNING_STATUSES = frozenset(
+    [
+        STATUS_RUNNING,
+        STATUS_PAUSE,
+        STATUS_END_PROGRAMMED,
+        STATUS_PROGRAMME_INTERRUPTED,
+        STATUS_RINSE_HOLD,
+    ]
+)
+
+TERMINATED_STATUSES = frozenset([STATUS_END_PROGRAMMED, STATUS_PROGRAMME_INTERRUPTED])
+
+CAPABILITIES = {
+    "1": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature.0",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+        "spinningSpeed",
+        "ecoFeedback.energyConsumption",
+        "ecoFeedback.waterConsumption",
+    ],
+    "2": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+        "dryingStep",
+        "ecoFeedback.energyConsumption",
+    ],
+    "7": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "signalInfo",
+        "signalFailure",
+        "remoteEnable",
+        "elapsedTime",
+        "ecoFeedback.energyConsumption",
+        "ecoFeedback.waterConsumption",
+    ],
+    "12": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+    ],
+    "13": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+    ],
+    "14": ["status", "signalFailure", "plateStep"],
+    "15": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+    ],
+    "16": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+    ],
+    "17": [
+        "ProgramID",
+        "status",
+        "programPhase",
+        "signalInfo",
+        "signalFailure",
+        "remoteEnable",
+    ],
+    "18": [
+        "status",
+        "signalInfo",
+        "signalFailure",
+        "remoteEnable",
+        "ventilationStep",
+    ],
+    "19": [
+        "status",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+    ],
+    "20": [
+        "status",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+    ],
+    "21": [
+        "status",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+    ],
+    "23": [
+        "ProgramID",
+        "status",
+        "programType",
+        "signalInfo",
+        "signalFailure",
+        "remoteEnable",
+        "batteryLevel",
+    ],
+    "24": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "targetTemperature.0",
+        "startTime",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+        "spinningSpeed",
+        "dryingStep",
+        "ecoFeedback.energyConsumption",
+        "ecoFeedback.waterConsumption",
+    ],
+    "25": [
+        "status",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "elapsedTime",
+    ],
+    "27": ["status", "signalFailure", "plateStep"],
+    "31": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+    ],
+    "32": [
+        "status",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+    ],
+    "33": [
+        "status",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+    ],
+    "34": [
+        "status",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+    ],
+    "45": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+    ],
+    "67": [
+        "ProgramID",
+        "status",
+        "programType",
+        "programPhase",
+        "remainingTime",
+        "startTime",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "signalDoor",
+        "remoteEnable",
+        "elapsedTime",
+    ],
+    "68": [
+        "status",
+        "targetTemperature",
+        "temperature",
+        "signalInfo",
+        "signalFailure",
+        "remoteEnable",
+    ],
+}
@@ -0,0 +1,254 @@
+"""
+Keeps the Miele device state in sync with the Miele cloud.
+"""
+import asyncio
+import logging
+import time
+
+from homeassistant.core import callback
+
+from .const import DATA_APPLIANCES, DATA_DEVICES
+from .model import MieleAppliance
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _to_dict(items):
+    # Replace with map()
+    result = {}
+    for item in items:
+        ident = item["ident"]
+        result[ident["deviceIdentLabel"]["fabNumber"]] = item
+
+    return result
+
+
+def _changed_keys(old, new):
+    """Return the state keys that differ between two payloads of a device.
+
+    None means that every entity of the device has to be refreshed.
+    """
+    if old is None or new is None or old.get("ident") != new.get("ident"):
+        return None
+
+    old_state = old.get("state", {})
+    new_state = new.get("state", {})
+    changed = {
+        key
+        for key in old_state.keys() | new_state.keys()
+        if old_state.get(key) != new_state.get(key)
+    }
+    if old.get("actions") != new.get("actions"):
+        changed.add("actions")
+
+    return changed
+
+
+class MieleCoordinator(object):
+    """
+    Fetches the device state of a Miele account and hands the changes to
+    on_update. The devices are kept in the account data.
+
+    At most one fetch is in flight at any time, refreshes requested meanwhile
+    wait for it instead of starting their own. Every poll, single device fetch
+    and event gets a sequence number so a response that completes after newer
+    data arrived is discarded.
+
+    Devices restored from the snapshot store stay in restored until the first
+    live data for them arrives.
+
+    on_update returns the number of entities it updated, which is recorded
+    in the telemetry together with the duration of every poll.
+    """
+
+    def __init__(
+        self,
+        hass,
+        account,
+        client,
+        lang,
+        on_update,
+        snapshot_store=None,
+        telemetry=None,
+    ):
+        self._hass = hass
+        self._account = account
+        self._client = client
+        self._lang = lang
+        self._on_update = on_update
+        self._fetch = None
+        self._sequence = 0
+        self._applied_sequence = 0
+        self._device_fetches = {}
+        self._device_refetch = set()
+        self._device_sequences = {}
+        self._snapshot_store = snapshot_store
+        self._telemetry = telemetry
+
+        self.restored = set()
+        self.refresh_count = 0
+        self.coalesced_count = 0
+        self.skipped_count = 0
+
+        client.add_command_listener(self.async_request_device_refresh)
+
+    @property
+    def lang(self):
+        return self._lang
+
+    @property
+    def devices(self):
+        return self._account[DATA_DEVICES]
+
+    @property
+    def appliances(self):
+        return self._account[DATA_APPLIANCES]
+
+    @callback
+    def async_restore(self, devices):
+        """Use a device snapshot until the first fetch completes."""
+        _LOGGER.debug("Restored {} Miele devices from snapshot".format(len(devices)))
+        self._account[DATA_DEVICES] = devices
+        self._account[DATA_APPLIANCES] = {
+            device_id: MieleAppliance(device) for device_id, device in devices.items()
+        }
+        self.restored = set(devices)
+
+    async def async_refresh(self):
+        """Fetch all devices, joining the fetch already in flight if any."""
+        if self._fetch is None:
+            self._fetch = self._hass.async_create_task(self._async_fetch())
+        else:
+            self.coalesced_count += 1
+            _LOGGER.debug("Miele refresh already in flight, waiting for it")
+
+        # Shielded so a cancelled caller does not cancel the fetch for the others.
+        await asyncio.shield(self._fetch)
+
+    async def _async_fetch(self):
+        self._sequence += 1
+        sequence = self._sequence
+        self.refresh_count += 1
+        start = time.monotonic()
+        success = False
+        updated = 0
+        try:
+            _LOGGER.debug("Attempting to update Miele devices")
+            try:
+                device_state = await self._client.get_devices(self._lang)
+            except Exception:
+                _LOGGER.exception("Unexpected error updating Miele devices")
+                device_state = None
+
+            if device_state is None:
+                _LOGGER.error("Did not receive Miele devices")
+            elif sequence < self._applied_sequence:
+                success = True
+                self.skipped_count += 1
+                _LOGGER.debug("Discarding Miele devices older than the last event")
+            else:
+                success = True
+                self._applied_sequence = sequence
+                devices = _to_dict(device_state)
+                for device_id in devices.keys() & self.devices.keys():
+                    # Keep devices that were fetched on their own in the meantime.
+                    if self._device_sequences.get(device_id, 0) > sequence:
+                        devices[device_id] = self.devices[device_id]
+                updated = self._on_update(self._store_devices(devices, True))
+        finally:
+            self._fetch = None
+            if self._telemetry is not None:
+                self._telemetry.record_refresh(
+                    time.monotonic() - start, success, updated or 0
+                )
+
+    @callback
+    def async_request_device_refresh(self, device_id):
+        """Fetch the state of a single device, e.g. after a command was sent."""
+        if device_id in self._device_fetches:
+            self._device_refetch.add(device_id)
+            return
+
+        self._device_fetches[device_id] = self._hass.async_create_task(
+            self._async_fetch_device(device_id)
+        )
+
+    async def _async_fetch_device(self, device_id):
+        try:
+            while True:
+                self._device_refetch.discard(device_id)
+                self._sequence += 1
+                sequence = self._sequence
+
+                state = await self._client.get_device_state(device_id, self._lang)
+                device = self.devices.get(device_id)
+                if (
+                    state is not None
+                    and device is not None
+                    and sequence >= self._applied_sequence
+                ):
+                    self._device_sequences[device_id] = sequence
+                    device = dict(device, state=state)
+                    self._on_update(self._store_devices({device_id: device}))
+
+                if device_id not in self._device_refetch:
+                    return
+        finally:
+            del self._device_fetches[device_id]
+
+    @callback
+    def async_devices_event(self, devices):
+        _LOGGER.debug("Received Miele devices event")
+        self._sequence += 1
+        self._applied_sequence = self._sequence
+        self._on_update(self._store_devices(devices))
+
+    @callback
+    def async_actions_event(self, actions):
+        _LOGGER.debug("Received Miele actions event")
+        changes = {}
+        for device_id, device_actions in actions.items():
+            device = self.devices.get(device_id)
+            if device is not None and device.get("actions") != device_actions:
+                device["actions"] = device_actions
+                changes[device_id] = {"actions"}
+        self._on_update(changes)
+
+    @callback
+    def _store_devices(self, devices, replace=False):
+        """Store device payloads, returns the changed keys per device."""
+        current = self.devices
+        changes = {}
+        for device_id, device in devices.items():
+            # Actions are only delivered by the event stream, keep them across polls.
+            if "actions" not in device and "actions" in current.get(device_id, {}):
+                device["actions"] = current[device_id]["actions"]
+
+            changed = _changed_keys(current.get(device_id), device)
+            if device_id in self.restored:
+                # Restored entities become available again.
+                self.restored.discard(device_id)
+                changed = None
+            if changed is None or changed:
+                changes[device_id] = changed
+
+        if replace:
+            for device_id in current.keys() - devices.keys():
+                self.restored.discard(device_id)
+                changes[device_id] = None
+            self._account[DATA_DEVICES] = devices
+        else:
+            current.update(devices)
+
+        # Only changed payloads are decoded again.
+        appliances = self.appliances
+        for device_id in changes:
+            if device_id in self.devices:
+                appliances[device_id] = MieleAppliance(self.devices[device_id])
+            else:
+                appliances.pop(device_id, None)
+
+        if changes and self._snapshot_store is not None:
+            self._snapshot_store.async_save(self.devices)
+
+        return changes
@@ -0,0 +1,52 @@
+"""
+Declarative description of the entities created for Miele devices.
+"""
+from collections import namedtuple
+
+from .const import CAPABILITIES
+
+# An entity factory is used for a device if state_key is part of the device
+# state and the device type has the capability.
+MieleEntityDescriptor = namedtuple(
+    "MieleEntityDescriptor", ["state_key", "capability", "factory"]
+)
+
+
+def single_entity(entity_class, *args):
+    def factory(hass, device):
+        return [entity_class(hass, device, *args)]
+
+    return factory
+
+
+def entity_per_index(entity_class, key):
+    def factory(hass, device):
+        return [
+            entity_class(hass, device, key, index)
+            for index in range(len(device.temperatures[key]))
+        ]
+
+    return factory
+
+
+def compile_descriptors(descriptors):
+    """Map every device type to the descriptors its capabilities allow."""
+    table = {}
+    for device_type, capabilities in CAPABILITIES.items():
+        capabilities = frozenset(capabilities)
+        table[int(device_type)] = tuple(
+            descriptor
+            for descriptor in descriptors
+            if descriptor.capability in capabilities
+        )
+
+    return table
+
+
+def create_entities(table, hass, device):
+    entities = []
+    for descriptor in table.get(device.device_type, ()):
+        if descriptor.state_key in device.state_keys:
+            entities.extend(descriptor.factory(hass, device))
+
+    return entities
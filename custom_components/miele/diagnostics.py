@@ -0,0 +1,54 @@
+"""
+Diagnostics download of the Miele integration.
+"""
+from homeassistant.components.diagnostics import async_redact_data
+
+from .const import (
+    CONF_CLIENT_SECRET,
+    CONF_TOKEN,
+    DATA_ACCOUNTS,
+    DATA_APPLIANCES,
+    DATA_CLIENT,
+    DATA_COORDINATOR,
+    DATA_OAUTH,
+    DATA_PROGRAMS,
+    DATA_REGISTRY,
+    DATA_TELEMETRY,
+    DOMAIN,
+)
+
+TO_REDACT = {CONF_CLIENT_SECRET, CONF_TOKEN}
+
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    """Return the telemetry of an account and the appliances it sees."""
+    data = hass.data[DOMAIN][DATA_ACCOUNTS][entry.entry_id]
+    oauth = data[DATA_OAUTH]
+    coordinator = data[DATA_COORDINATOR]
+
+    diagnostics = data[DATA_TELEMETRY].as_dict()
+    diagnostics["entry"] = {
+        "data": async_redact_data(dict(entry.data), TO_REDACT),
+        "options": dict(entry.options),
+    }
+    diagnostics["token_refreshes"] = oauth.refresh_count
+    diagnostics["token_age"] = oauth.token_age
+    diagnostics["rate_limit"] = data[DATA_CLIENT].rate_limiter.as_dict()
+    diagnostics["coordinator"] = {
+        "refreshes": coordinator.refresh_count,
+        "coalesced": coordinator.coalesced_count,
+        "skipped": coordinator.skipped_count,
+        "restored": sorted(coordinator.restored),
+    }
+    diagnostics["devices"] = {
+        device_id: {
+            "type": device.type_name,
+            "tech_type": device.tech_type,
+            "status": device.status,
+        }
+        for device_id, device in data[DATA_APPLIANCES].items()
+    }
+    diagnostics["entities"] = len(data[DATA_REGISTRY])
+    diagnostics["programs"] = hass.data[DOMAIN][DATA_PROGRAMS].as_dict()
+
+    return diagnostics
@@ -0,0 +1,58 @@
+"""
+Base class for the entities of the Miele integration.
+"""
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+
+from .const import DATA_APPLIANCES, DATA_COORDINATOR, DATA_REGISTRY
+
+
+class MieleEntity(Entity):
+    """
+    Keeps the entity in the entity registry of the integration.
+
+    Subclasses keep the MieleAppliance they represent in _device. The
+    coordinator pushes every new state through async_update_appliance, the
+    entities are never polled. account is the data of the Miele account the
+    appliance belongs to, the entity registry sets it when it creates the
+    entity.
+    """
+
+    _attr_should_poll = False
+    account = None
+
+    @property
+    def device_id(self):
+        """Return the fabrication number of the appliance."""
+        return self._device.device_id
+
+    @property
+    def available(self):
+        # Entities created from the device snapshot wait for live data.
+        account = self.account
+        return (
+            account is not None
+            and self.device_id in account[DATA_APPLIANCES]
+            and self.device_id not in account[DATA_COORDINATOR].restored
+        )
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.account[DATA_REGISTRY].async_add(self)
+
+    async def async_will_remove_from_hass(self):
+        self.account[DATA_REGISTRY].async_remove(self)
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def async_update_appliance(self, device):
+        """Take over the latest state of the appliance and write it.
+
+        device is None if the appliance disappeared, the entity then keeps its
+        last state and becomes unavailable.
+        """
+        if device is not None:
+            self._device = device
+
+        if self.hass is not None:
+            self.async_write_ha_state()
@@ -1,48 +1,378 @@
 import asyncio
-import functools
 import json
 import logging
-import os
+import random
+import time
 from datetime import timedelta
+from email.utils import parsedate_to_datetime
 
-from requests.exceptions import ConnectionError
+import aiohttp
+from oauthlib.oauth2 import InvalidGrantError, OAuth2Error
+from requests import RequestException
 from requests_oauthlib import OAuth2Session
 
+from .telemetry import STATUS_ERROR
+
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "https://api.mcs3.miele.com"
+
+# Commands may use the whole request budget, polls leave a reserve to them.
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+
+
+def to_seconds(time_array):
+    """Convert a Miele [hours, minutes(, seconds)] time array to seconds."""
+    if len(time_array) == 3:
+        return time_array[0] * 3600 + time_array[1] * 60 + time_array[2]
+    elif len(time_array) == 2:
+        return time_array[0] * 3600 + time_array[1] * 60
+    else:
+        return 0
+
+
+# Actions that can be sent together in one request. A later value of a key
+# replaces an earlier one, and powerOn and powerOff replace each other.
+MERGEABLE_ACTIONS = frozenset(
+    ["powerOn", "powerOff", "light", "ventilationStep", "colors", "modes"]
+)
+EXCLUSIVE_ACTIONS = {"powerOn": "powerOff", "powerOff": "powerOn"}
+
+
+class _Command(object):
+    __slots__ = ("send", "body", "mergeable", "futures")
+
+    def __init__(self, send, body, mergeable):
+        self.send = send
+        self.body = body
+        self.mergeable = mergeable
+        self.futures = []
+
+
+class MieleRequestError(Exception):
+    """Raised when a request to the Miele cloud failed for good."""
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling the Miele cloud for a while after repeated failures.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60):
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+
+    @property
+    def is_open(self):
+        return (
+            self._opened_at is not None
+            and time.monotonic() - self._opened_at < self._cooldown
+        )
+
+    def record_success(self):
+        if self._opened_at is not None:
+            _LOGGER.info("Miele cloud reachable again")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        # Once tripped, every failure after the cooldown opens it again right away.
+        if self._failures >= self._failure_threshold:
+            if not self.is_open:
+                _LOGGER.warning(
+                    "Miele cloud failed {} times, pausing requests for {}s".format(
+                        self._failures, self._cooldown
+                    )
+                )
+            self._opened_at = time.monotonic()
+
+
+class RateLimiter(object):
+    """
+    Token bucket shared by all requests to the Miele cloud.
+
+    The bucket holds up to capacity tokens and refills at rate tokens per
+    second, every request takes one. Event stream connects and token
+    refreshes are charged without waiting. Polls leave the last reserve
+    tokens to commands. A 429 response blocks all requests for its
+    Retry-After.
+    """
+
+    DEFAULT_RETRY_AFTER = 60
+
+    def __init__(self, rate, capacity=30, reserve=5):
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = min(reserve, capacity - 1)
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0
+        self.throttled_count = 0
+        self.rate_limited_count = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        return now
+
+    @property
+    def tokens(self):
+        self._refill()
+        return self._tokens
+
+    @property
+    def blocked_for(self):
+        """Seconds until the Retry-After of the last 429 response has passed."""
+        return max(self._blocked_until - time.monotonic(), 0)
+
+    def delay(self, priority):
+        """Return the seconds until a request of priority may be sent."""
+        now = self._refill()
+        wait = max(self._blocked_until - now, 0)
+        needed = 1 if priority == PRIORITY_COMMAND else 1 + self.reserve
+        if self._tokens < needed:
+            wait = max(wait, (needed - self._tokens) / self.rate)
+        return wait
+
+    async def acquire(self, priority, max_wait):
+        """Wait for a token, raises MieleRequestError if that takes too long."""
+        deadline = time.monotonic() + max_wait
+        throttled = False
+        while True:
+            delay = self.delay(priority)
+            if delay <= 0:
+                self._tokens -= 1
+                return
+
+            if time.monotonic() + delay > deadline:
+                raise MieleRequestError(
+                    "Miele API budget exhausted, next request in {:.0f}s".format(delay)
+                )
+
+            if not throttled:
+                throttled = True
+                self.throttled_count += 1
+            await asyncio.sleep(delay)
+
+    def charge(self):
+        """Take a token for a request that was sent without acquiring one."""
+        self._refill()
+        self._tokens -= 1
+
+    def block(self, retry_after):
+        """Stop all requests after a 429 response."""
+        retry_after = _parse_retry_after(retry_after, self.DEFAULT_RETRY_AFTER)
+        _LOGGER.warning(
+            "Miele API rate limit reached, pausing requests for {}s".format(retry_after)
+        )
+        self.rate_limited_count += 1
+        self._refill()
+        self._tokens = min(self._tokens, 0)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def stretch_interval(self, interval):
+        """Stretch a poll interval while the budget runs low."""
+        available = self.tokens - self.reserve
+        if available < self.capacity / 2:
+            # Fewer polls the closer the budget gets to the reserve.
+            interval = max(interval, self.capacity / 2 / max(available, 1) / self.rate)
+        return max(interval, self.blocked_for)
+
+    def as_dict(self):
+        return {
+            "requests_per_hour": self.rate * 3600,
+            "capacity": self.capacity,
+            "reserve": self.reserve,
+            "tokens": self.tokens,
+            "blocked_for": self.blocked_for,
+            "throttled": self.throttled_count,
+            "rate_limited": self.rate_limited_count,
+        }
 
-class MieleClient(object):
-    DEVICES_URL = "https://api.mcs3.miele.com/v1/devices"
-    ACTION_URL = "https://api.mcs3.miele.com/v1/devices/{0}/actions"
-    PROGRAMS_URL = "https://api.mcs3.miele.com/v1/devices/{0}/programs"
 
-    def __init__(self, hass, session):
+def _parse_retry_after(value, default):
+    """Return the seconds of a Retry-After header, given in seconds or as a date."""
+    if value is None:
+        return default
+
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+
+    return max(retry_at.timestamp() - time.time(), 0)
+
+
+class MieleClient(object):
+    DEVICES_PATH = "/v1/devices"
+    DEVICE_PATH = "/v1/devices/{0}"
+    STATE_PATH = "/v1/devices/{0}/state"
+    ACTION_PATH = "/v1/devices/{0}/actions"
+    PROGRAMS_PATH = "/v1/devices/{0}/programs"
+
+    REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_connect=10, sock_read=20)
+    MAX_ATTEMPTS = 3
+    MAX_UNAUTHORIZED_RETRIES = 1
+    BACKOFF_BASE = 1
+    BACKOFF_MAX = 30
+    # Longest wait for the request budget before a request is given up.
+    MAX_BUDGET_WAIT = 30
+
+    def __init__(
+        self,
+        hass,
+        session,
+        websession,
+        base_url=DEFAULT_BASE_URL,
+        recorder=None,
+        telemetry=None,
+        rate_limiter=None,
+    ):
         self._session = session
+        self._websession = websession
         self.hass = hass
+        self._base_url = base_url.rstrip("/")
+        self._recorder = recorder
+        self._telemetry = telemetry
+        self.rate_limiter = rate_limiter
+        self._breaker = CircuitBreaker()
+        self._commands = {}
+        self._command_workers = {}
+        self._command_listeners = []
+
+    def _url(self, path, *args):
+        return self._base_url + path.format(*args)
+
+    async def _request(self, method, path, *args, priority=PRIORITY_POLL, **kwargs):
+        """Send a request to path formatted with args, returns status and payload.
+
+        Failed requests are retried. Every attempt takes a token from the rate
+        limiter and is recorded in the telemetry under the unformatted path.
+        """
+        url = self._url(path, *args)
+        if self._breaker.is_open:
+            raise MieleRequestError("Miele cloud unavailable, waiting for cooldown")
+
+        attempt = 0
+        unauthorized_retries = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(priority, MieleClient.MAX_BUDGET_WAIT)
+
+            access_token = await self._session.async_get_access_token()
+            if access_token is None:
+                raise MieleRequestError("Miele@home is not authorized")
+
+            start = time.monotonic()
+            try:
+                status, payload, size = await self._send(
+                    method, url, access_token, **kwargs
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                self._record_request(path, STATUS_ERROR, start, 0)
+                error = repr(err)
+            else:
+                self._record_request(path, status, start, size)
+                if (
+                    status == 401
+                    and unauthorized_retries < MieleClient.MAX_UNAUTHORIZED_RETRIES
+                ):
+                    unauthorized_retries += 1
+                    _LOGGER.info("Request unauthorized - attempting token refresh")
+                    if await self._session.refresh_token(self.hass, access_token):
+                        continue
+
+                if status < 500 and status != 429:
+                    self._breaker.record_success()
+                    return status, payload
+
+                error = "HTTP {}".format(status)
+
+            attempt += 1
+            if attempt >= MieleClient.MAX_ATTEMPTS:
+                self._breaker.record_failure()
+                raise MieleRequestError(
+                    "{} {} failed after {} attempts: {}".format(
+                        method, url, attempt, error
+                    )
+                )
+
+            # Capped exponential backoff with full jitter.
+            delay = random.uniform(
+                0,
+                min(MieleClient.BACKOFF_MAX, MieleClient.BACKOFF_BASE * 2**attempt),
+            )
+            _LOGGER.debug(
+                "{} {} failed ({}), retrying in {:.1f}s".format(
+                    method, url, error, delay
+                )
+            )
+            await asyncio.sleep(delay)
+
+    async def _send(self, method, url, access_token, **kwargs):
+        headers = {"Authorization": "Bearer {}".format(access_token)}
+        if "json" in kwargs:
+            headers["Content-Type"] = "application/json"
+
+        async with self._websession.request(
+            method,
+            url,
+            headers=headers,
+            timeout=MieleClient.REQUEST_TIMEOUT,
+            **kwargs,
+        ) as response:
+            if response.status == 429 and self.rate_limiter is not None:
+                self.rate_limiter.block(response.headers.get("Retry-After"))
+
+            # The body is read as bytes to count the downloaded data.
+            body = await response.read()
+            if response.status == 204 or not body:
+                return response.status, None, len(body)
+
+            text = body.decode(response.get_encoding(), errors="replace")
+            try:
+                payload = json.loads(text)
+            except ValueError:
+                payload = text
+
+            return response.status, payload, len(body)
+
+    def _record_request(self, path, status, start, size):
+        if self._telemetry is not None:
+            self._telemetry.record_request(path, status, time.monotonic() - start, size)
 
     async def _get_devices_raw(self, lang):
         _LOGGER.debug("Requesting Miele device update")
         try:
-            func = functools.partial(
-                self._session._session.get,
-                MieleClient.DEVICES_URL,
-                params={"language": lang},
+            status, devices = await self._request(
+                "GET", MieleClient.DEVICES_PATH, params={"language": lang}
             )
-            devices = await self.hass.async_add_executor_job(func)
-            if devices.status_code == 401:
-                _LOGGER.info("Request unauthorized - attempting token refresh")
-                if await self._session.refresh_token(self.hass):
-                    return await self._get_devices_raw(lang)
+            if status != 200:
+                _LOGGER.debug("Failed to retrieve devices: {}".format(status))
+                return None
 
-            if devices.status_code != 200:
-                _LOGGER.debug(
-                    "Failed to retrieve devices: {}".format(devices.status_code)
-                )
+            if not isinstance(devices, dict):
+                _LOGGER.error("Malformed Miele devices response: {}".format(devices))
                 return None
 
-            return devices.json()
+            if self._recorder is not None:
+                self._recorder.record("devices", devices)
+
+            return devices
 
-        except ConnectionError as err:
+        except MieleRequestError as err:
             _LOGGER.error("Failed to retrieve Miele devices: {0}".format(err))
             return None
 
@@ -57,108 +387,337 @@ class MieleClient(object):
 
         return result
 
-    def get_device(self, device_id, lang="en"):
-        devices = self._get_devices_raw(lang)
-        if devices is None:
-            return None
+    async def get_device(self, device_id, lang="en"):
+        return await self._get_device_resource(MieleClient.DEVICE_PATH, device_id, lang)
 
-        if devices is not None:
-            return devices[device_id]
+    async def get_device_state(self, device_id, lang="en"):
+        return await self._get_device_resource(MieleClient.STATE_PATH, device_id, lang)
 
-        return None
+    async def get_programs(self, device_id, lang="en"):
+        """Return the programs the appliance can start, None if that failed."""
+        return await self._get_device_resource(
+            MieleClient.PROGRAMS_PATH, device_id, lang
+        )
 
-    async def action(self, device_id, body):
-        _LOGGER.debug("Executing device action for {}{}".format(device_id, body))
+    async def _get_device_resource(self, path, device_id, lang):
+        _LOGGER.debug("Requesting Miele device update for {}".format(device_id))
         try:
-            headers = {"Content-Type": "application/json"}
-            func = functools.partial(
-                self._session._session.put,
-                MieleClient.ACTION_URL.format(device_id),
-                data=json.dumps(body),
-                headers=headers,
+            status, result = await self._request(
+                "GET", path, device_id, params={"language": lang}
             )
-            result = await self.hass.async_add_executor_job(func)
-            if result.status_code == 401:
-                _LOGGER.info("Request unauthorized - attempting token refresh")
-
-                if await self._session.refresh_token(self.hass):
-                    if self._session.authorized:
-                        return self.action(device_id, body)
-                    else:
-                        self._session._delete_token()
-                        self._session.new_session()
-                        return self.action(device_id, body)
-
-            if result.status_code == 200:
-                return result.json()
-            elif result.status_code == 204:
-                return None
-            else:
-                _LOGGER.error(
-                    "Failed to execute device action for {}: {} {}".format(
-                        device_id, result.status_code, result.json()
-                    )
+            if status != 200:
+                _LOGGER.debug(
+                    "Failed to retrieve device {}: {}".format(device_id, status)
                 )
                 return None
 
-        except ConnectionError as err:
-            _LOGGER.error("Failed to execute device action: {}".format(err))
+            return result
+
+        except MieleRequestError as err:
+            _LOGGER.error("Failed to retrieve Miele device: {0}".format(err))
             return None
 
+    def add_command_listener(self, listener):
+        """Call listener with the device id after a command succeeded."""
+        self._command_listeners.append(listener)
+
+    async def action(self, device_id, body):
+        mergeable = isinstance(body, dict) and body.keys() <= MERGEABLE_ACTIONS
+        return await self._enqueue(device_id, self._send_action, body, mergeable)
+
     async def start_program(self, device_id, program_id):
-        _LOGGER.debug("Starting program {} for {}".format(program_id, device_id))
+        return await self._enqueue(
+            device_id, self._send_start_program, {"programId": program_id}, False
+        )
+
+    async def _enqueue(self, device_id, send, body, mergeable):
+        """Queue a command for a device and wait for the outcome of its request.
+
+        Commands of a device are sent one at a time. A mergeable action that is
+        queued behind another mergeable action is combined with it into a
+        single request, later values replacing earlier ones. Raises
+        MieleRequestError to every merged caller if the request failed.
+        """
+        queue = self._commands.setdefault(device_id, [])
+        if mergeable and queue and queue[-1].mergeable:
+            command = queue[-1]
+            for key in body:
+                command.body.pop(EXCLUSIVE_ACTIONS.get(key), None)
+            command.body.update(body)
+            _LOGGER.debug("Merged action for {}: {}".format(device_id, command.body))
+        else:
+            command = _Command(send, dict(body) if mergeable else body, mergeable)
+            queue.append(command)
+
+        future = asyncio.get_running_loop().create_future()
+        command.futures.append(future)
+
+        if device_id not in self._command_workers:
+            self._command_workers[device_id] = self.hass.async_create_task(
+                self._process_commands(device_id)
+            )
+
+        return await future
+
+    async def _process_commands(self, device_id):
+        queue = self._commands[device_id]
         try:
-            headers = {"Content-Type": "application/json"}
-            func = functools.partial(
-                self._session._session.put,
-                MieleClient.PROGRAMS_URL.format(device_id),
-                data=json.dumps({"programId": program_id}),
-                headers=headers,
+            while queue:
+                command = queue.pop(0)
+                try:
+                    result = await command.send(device_id, command.body)
+                except Exception as err:
+                    for future in command.futures:
+                        if not future.done():
+                            future.set_exception(err)
+                    continue
+
+                for future in command.futures:
+                    if not future.done():
+                        future.set_result(result)
+
+                for listener in self._command_listeners:
+                    listener(device_id)
+        finally:
+            del self._command_workers[device_id]
+
+    async def _send_action(self, device_id, body):
+        _LOGGER.debug("Executing device action for {}{}".format(device_id, body))
+        status, result = await self._request(
+            "PUT",
+            MieleClient.ACTION_PATH,
+            device_id,
+            json=body,
+            priority=PRIORITY_COMMAND,
+        )
+        if status not in (200, 204):
+            raise MieleRequestError(
+                "Failed to execute device action for {}: {} {}".format(
+                    device_id, status, result
+                )
             )
-            result = await self.hass.async_add_executor_job(func)
-            if result.status_code == 401:
-                _LOGGER.info("Request unauthorized - attempting token refresh")
-
-                if await self._session.refresh_token(self.hass):
-                    if self._session.authorized:
-                        return self.start_program(device_id, program_id)
-                    else:
-                        self._session._delete_token()
-                        self._session.new_session()
-                        return self.start_program(device_id, program_id)
-
-            if result.status_code == 200:
-                return result.json()
-            elif result.status_code == 204:
-                return None
-            else:
-                _LOGGER.error(
-                    "Failed to execute start program for {}: {} {}".format(
-                        device_id, result.status_code, result.json()
-                    )
+
+        return result
+
+    async def _send_start_program(self, device_id, body):
+        _LOGGER.debug("Starting program {} for {}".format(body["programId"], device_id))
+        status, result = await self._request(
+            "PUT",
+            MieleClient.PROGRAMS_PATH,
+            device_id,
+            json=body,
+            priority=PRIORITY_COMMAND,
+        )
+        if status not in (200, 204):
+            raise MieleRequestError(
+                "Failed to execute start program for {}: {} {}".format(
+                    device_id, status, result
                 )
-                return None
+            )
 
-        except ConnectionError as err:
-            _LOGGER.error("Failed to execute start program: {}".format(err))
-            return None
+        return result
+
+
+class MieleEventStream(object):
+    """
+    Subscribes to the Miele Server-Sent Events feed for all devices.
+    """
+
+    EVENTS_PATH = "/v1/devices/all/events"
+
+    # Miele sends a ping event every few seconds, so a silent stream is a dead one.
+    HEARTBEAT_TIMEOUT = 60
+    MIN_RECONNECT_DELAY = 1
+    MAX_RECONNECT_DELAY = 300
+
+    def __init__(
+        self,
+        hass,
+        session,
+        websession,
+        lang,
+        on_devices,
+        on_actions,
+        base_url=DEFAULT_BASE_URL,
+        rate_limiter=None,
+    ):
+        self._session = session
+        self._websession = websession
+        self.hass = hass
+        self._lang = lang
+        self._rate_limiter = rate_limiter
+        self._on_devices = on_devices
+        self._on_actions = on_actions
+        self._url = base_url.rstrip("/") + MieleEventStream.EVENTS_PATH
+        self._last_event_id = None
+        self._reconnect_delay = MieleEventStream.MIN_RECONNECT_DELAY
+        self._connected = False
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = self.hass.async_create_background_task(
+                self._run(), "miele event stream"
+            )
+
+    async def stop(self, event=None):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        delay = self._reconnect_delay
+        while True:
+            self._connected = False
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                _LOGGER.warning("Miele event stream interrupted: {}".format(err))
+            except MieleRequestError as err:
+                _LOGGER.warning("Miele event stream not connected: {}".format(err))
+            except Exception:
+                _LOGGER.exception("Unexpected error in Miele event stream")
+
+            if self._connected:
+                delay = self._reconnect_delay
+
+            _LOGGER.debug("Reconnecting Miele event stream in {}s".format(delay))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MieleEventStream.MAX_RECONNECT_DELAY)
+
+    async def _listen(self):
+        access_token = await self._session.async_get_access_token()
+        if access_token is None:
+            raise MieleRequestError("Miele@home is not authorized")
+
+        headers = {
+            "Accept": "text/event-stream",
+            "Accept-Language": self._lang,
+            "Authorization": "Bearer {}".format(access_token),
+        }
+        if self._last_event_id is not None:
+            # Lets the server resume from where the previous connection dropped.
+            headers["Last-Event-ID"] = self._last_event_id
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.charge()
+        async with self._websession.get(
+            self._url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=30),
+        ) as response:
+            if response.status == 401:
+                _LOGGER.info("Event stream unauthorized - attempting token refresh")
+                await self._session.refresh_token(self.hass, access_token)
+                return
+
+            if response.status != 200:
+                _LOGGER.debug("Failed to open event stream: {}".format(response.status))
+                return
+
+            _LOGGER.debug("Miele event stream connected")
+            self._connected = True
+            await self._read_events(response)
+
+    async def _read_events(self, response):
+        event_type = None
+        data = []
+        while True:
+            raw = await asyncio.wait_for(
+                response.content.readline(), MieleEventStream.HEARTBEAT_TIMEOUT
+            )
+            if not raw:
+                _LOGGER.debug("Miele event stream closed by server")
+                return
+
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if not line:
+                if data:
+                    self._dispatch(event_type, "\n".join(data))
+                event_type = None
+                data = []
+                continue
+
+            if line.startswith(":"):
+                continue
+
+            field, _, value = line.partition(":")
+            if value.startswith(" "):
+                value = value[1:]
+
+            if field == "event":
+                event_type = value
+            elif field == "data":
+                data.append(value)
+            elif field == "id":
+                self._last_event_id = value
+            elif field == "retry" and value.isdigit():
+                self._reconnect_delay = max(
+                    int(value) / 1000, MieleEventStream.MIN_RECONNECT_DELAY
+                )
+
+    def _dispatch(self, event_type, data):
+        if event_type not in ("devices", "actions"):
+            return
+
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            _LOGGER.warning("Malformed Miele {} event: {}".format(event_type, data))
+            return
+
+        if event_type == "devices":
+            self._on_devices(payload)
+        else:
+            self._on_actions(payload)
 
 
 class MieleOAuth(object):
     """
     Implements Authorization Code Flow for Miele@home implementation.
-    """
 
-    OAUTH_AUTHORIZE_URL = "https://api.mcs3.miele.com/thirdparty/login"
-    OAUTH_TOKEN_URL = "https://api.mcs3.miele.com/thirdparty/token"
+    The token is persisted in store, the config flow authorizes without one.
+    A refresh that fails on the way keeps the token and is retried after
+    REFRESH_RETRY seconds. Only a refresh token rejected with invalid_grant
+    drops the token and calls on_auth_failed.
+    """
 
-    def __init__(self, hass, client_id, client_secret, redirect_uri, cache_path=None):
+    OAUTH_AUTHORIZE_PATH = "/thirdparty/login"
+    OAUTH_TOKEN_PATH = "/thirdparty/token"
+
+    # Refresh this many seconds before the access token expires.
+    REFRESH_MARGIN = 300
+    # Wait this many seconds after a failed refresh before the next one.
+    REFRESH_RETRY = 60
+
+    def __init__(
+        self,
+        hass,
+        client_id,
+        client_secret,
+        redirect_uri,
+        store,
+        base_url=DEFAULT_BASE_URL,
+        on_auth_failed=None,
+        rate_limiter=None,
+    ):
+        self._hass = hass
+        self._authorize_url = base_url.rstrip("/") + MieleOAuth.OAUTH_AUTHORIZE_PATH
+        self._token_url = base_url.rstrip("/") + MieleOAuth.OAUTH_TOKEN_PATH
         self._client_id = client_id
         self._client_secret = client_secret
-        self._cache_path = cache_path
+        self._store = store
         self._redirect_uri = redirect_uri
+        self._on_auth_failed = on_auth_failed
+        self._rate_limiter = rate_limiter
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_retry_at = 0
+        self.refresh_count = 0
 
-        self._token = self._get_cached_token()
+        self._token = None
+        self._token_obtained_at = None
 
         self._extra = {
             "client_id": self._client_id,
@@ -167,29 +726,60 @@ class MieleOAuth(object):
 
         self._session = OAuth2Session(
             self._client_id,
-            auto_refresh_url=MieleOAuth.OAUTH_TOKEN_URL,
+            auto_refresh_url=self._token_url,
             redirect_uri=redirect_uri,
             token=self._token,
             token_updater=self._save_token,
             auto_refresh_kwargs=self._extra,
         )
 
-        if self.authorized:
-            asyncio.create_task(self.refresh_token(hass))
+    async def async_load_token(self):
+        """Load the persisted token, must be awaited once before first use."""
+        self._token = await self._store.async_load()
+        if self._token is None:
+            return
+
+        self._session.token = self._token
+        if "expires_at" in self._token:
+            self._token_obtained_at = self._token["expires_at"] - self._token.get(
+                "expires_in", 0
+            )
 
     @property
     def authorized(self):
         return self._session.authorized
 
     @property
-    def authorization_url(self):
-        return self._session.authorization_url(
-            MieleOAuth.OAUTH_AUTHORIZE_URL, state="login"
-        )[0]
+    def access_token(self):
+        if self._token is None:
+            return None
+        return self._token.get("access_token")
+
+    @property
+    def token_age(self):
+        """Seconds since the current token was issued."""
+        if self._token_obtained_at is None:
+            return None
+        return time.time() - self._token_obtained_at
+
+    async def async_get_access_token(self):
+        """Return a valid access token, refreshing it ahead of expiry."""
+        if (
+            self._token is not None
+            and "expires_at" in self._token
+            and self._token["expires_at"] - MieleOAuth.REFRESH_MARGIN < time.time()
+        ):
+            await self.refresh_token(self._hass, self.access_token)
+
+        return self.access_token
+
+    def authorization_url(self, state):
+        """Return the login url, the callback receives state back."""
+        return self._session.authorization_url(self._authorize_url, state=state)[0]
 
     def get_access_token(self, client_code):
         token = self._session.fetch_token(
-            MieleOAuth.OAUTH_TOKEN_URL,
+            self._token_url,
             code=client_code,
             include_client_id=True,
             client_secret=self._client_secret,
@@ -198,85 +788,70 @@ class MieleOAuth(object):
 
         return token
 
-    async def refresh_token(self, hass):
-        body = "client_id={}&client_secret={}&".format(
-            self._client_id, self._client_secret
-        )
-        self._token = await hass.async_add_executor_job(
-            self.sync_refresh_token,
-            MieleOAuth.OAUTH_TOKEN_URL,
-            body,
-            self._token["refresh_token"],
-        )
-        self._save_token(self._token)
+    async def refresh_token(self, hass, rejected_token=None):
+        """Refresh the token, only one refresh runs at a time.
 
-    def sync_refresh_token(self, token_url, body, refresh_token):
-        try:
-            return self._session.refresh_token(
-                token_url, body=body, refresh_token=refresh_token
-            )
-        except:
-            self._remove_token()
+        rejected_token is the access token a caller found to be invalid. If the
+        token was replaced meanwhile by another caller, no new refresh is done.
+        """
+        if rejected_token is None:
+            rejected_token = self.access_token
 
-    def _get_cached_token(self):
-        token = None
-        if self._cache_path:
-            try:
-                f = open(self._cache_path)
-                token_info_string = f.read()
-                f.close()
-                token = json.loads(token_info_string)
+        async with self._refresh_lock:
+            if self.access_token != rejected_token:
+                return self._token is not None
 
-            except IOError:
-                pass
+            if self._token is None or time.monotonic() < self._refresh_retry_at:
+                return False
 
-        return token
-
-    def _delete_token(self):
-        if self._cache_path:
+            _LOGGER.debug("Refreshing Miele access token")
+            body = "client_id={}&client_secret={}&".format(
+                self._client_id, self._client_secret
+            )
+            self.refresh_count += 1
+            if self._rate_limiter is not None:
+                self._rate_limiter.charge()
             try:
-                os.remove(self._cache_path)
-
-            except IOError:
-                _LOGGER.warn("Unable to delete cached token")
+                token = await hass.async_add_executor_job(
+                    self.sync_refresh_token,
+                    self._token_url,
+                    body,
+                    self._token["refresh_token"],
+                )
+            except InvalidGrantError as err:
+                _LOGGER.warning(
+                    "Miele refresh token rejected, reauthorization needed: {}".format(
+                        err
+                    )
+                )
+                self._save_token(None)
+                if self._on_auth_failed is not None:
+                    self._on_auth_failed()
+                return False
+            except (OAuth2Error, RequestException, ValueError) as err:
+                _LOGGER.warning(
+                    "Refreshing Miele access token failed, retrying in {}s: {!r}".format(
+                        MieleOAuth.REFRESH_RETRY, err
+                    )
+                )
+                self._refresh_retry_at = time.monotonic() + MieleOAuth.REFRESH_RETRY
+                return False
 
-        self._token = None
+            self._save_token(token)
+            return True
 
-    def _new_session(self, redirect_uri):
-        self._session = OAuth2Session(
-            self._client_id,
-            auto_refresh_url=MieleOAuth.OAUTH_TOKEN_URL,
-            redirect_uri=self._redirect_uri,
-            token=self._token,
-            token_updater=self._save_token,
-            auto_refresh_kwargs=self._extra,
+    def sync_refresh_token(self, token_url, body, refresh_token):
+        return self._session.refresh_token(
+            token_url, body=body, refresh_token=refresh_token
         )
 
-        if self.authorized:
-            self.refresh_token()
-
     def _save_token(self, token):
         _LOGGER.debug("trying to save new token")
-        if self._cache_path:
-            try:
-                f = open(self._cache_path, "w")
-                f.write(json.dumps(token))
-                f.close()
-            except IOError:
-                _LOGGER.warn(
-                    "Couldn't write token cache to {0}".format(self._cache_path)
-                )
-                pass
+        if self._store is not None:
+            if token is None:
+                self._store.remove()
+            else:
+                self._store.save(token)
 
         self._token = token
-
-    def _remove_token(self):
-        _LOGGER.debug("trying to REMOVE token to create it again on next startup so please re-startup and try again!")
-        if self._cache_path:
-            try:
-                os.remove(self._cache_path)
-            except IOError:
-                _LOGGER.warn(
-                    "Couldn't delte token cache to {0}".format(self._cache_path)
-                )
-                pass
+        self._token_obtained_at = time.time() if token is not None else None
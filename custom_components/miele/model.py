@@ -0,0 +1,155 @@
+"""
+Parsed state of Miele appliances.
+"""
+import sys
+from collections import namedtuple
+
+from .miele_at_home import to_seconds
+
+MieleValue = namedtuple("MieleValue", ["raw", "localized"])
+MieleMeasurement = namedtuple("MieleMeasurement", ["value", "unit"])
+MieleTemperature = namedtuple("MieleTemperature", ["value", "unit"])
+
+# State keys holding a value_raw/value_localized pair.
+VALUE_KEYS = (
+    "status",
+    "ProgramID",
+    "programType",
+    "programPhase",
+    "dryingStep",
+    "spinningSpeed",
+    "ventilationStep",
+)
+TIME_KEYS = ("remainingTime", "startTime", "elapsedTime")
+TEMPERATURE_KEYS = ("targetTemperature", "temperature")
+SIGNAL_KEYS = ("signalInfo", "signalFailure", "signalDoor")
+
+TEMPERATURE_NOT_AVAILABLE = -32768
+
+
+def _intern(value):
+    # Localized texts repeat across appliances and polls, keep a single copy.
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def _value(item):
+    if item is None:
+        return MieleValue(None, None)
+    return MieleValue(item.get("value_raw"), _intern(item.get("value_localized")))
+
+
+def _temperature(item):
+    value = item.get("value_raw")
+    if value is None or value == TEMPERATURE_NOT_AVAILABLE:
+        value = None
+    else:
+        value = value / 100
+    return MieleTemperature(value, _intern(item.get("unit")))
+
+
+def _measurement(item):
+    if item is None:
+        return None
+    return MieleMeasurement(item.get("value"), _intern(item.get("unit")))
+
+
+def _time(time_array):
+    if time_array is None or len(time_array) not in (2, 3):
+        return None
+    return to_seconds(time_array)
+
+
+class MieleEcoFeedback(object):
+    __slots__ = (
+        "energy_consumption",
+        "water_consumption",
+        "energy_forecast",
+        "water_forecast",
+    )
+
+    def __init__(self, eco_feedback):
+        self.energy_consumption = _measurement(
+            eco_feedback.get("currentEnergyConsumption")
+        )
+        self.water_consumption = _measurement(
+            eco_feedback.get("currentWaterConsumption")
+        )
+        self.energy_forecast = eco_feedback.get("energyForecast")
+        self.water_forecast = eco_feedback.get("waterForecast")
+
+
+class MieleAppliance(object):
+    """
+    The state of an appliance, decoded once per update of its payload.
+
+    Entities read these fields instead of walking the /v1/devices payload on
+    every state write. Times are in seconds, temperatures in degrees.
+    """
+
+    __slots__ = (
+        "device_id",
+        "device_type",
+        "type_name",
+        "name",
+        "tech_type",
+        "gateway_type",
+        "gateway_version",
+        "state_keys",
+        "values",
+        "times",
+        "temperatures",
+        "plate_steps",
+        "eco_feedback",
+        "signals",
+        "light",
+        "battery_level",
+    )
+
+    def __init__(self, device):
+        ident = device["ident"]
+        ident_label = ident.get("deviceIdentLabel") or {}
+        xkm_label = ident.get("xkmIdentLabel") or {}
+        self.device_id = ident_label["fabNumber"]
+        self.device_type = ident["type"]["value_raw"]
+        self.type_name = _intern(ident["type"]["value_localized"])
+        self.name = ident.get("deviceName") or self.type_name
+        self.tech_type = ident_label.get("techType")
+        self.gateway_type = xkm_label.get("techType")
+        self.gateway_version = xkm_label.get("releaseVersion")
+
+        state = device.get("state") or {}
+        self.state_keys = frozenset(state)
+        self.values = {key: _value(state[key]) for key in VALUE_KEYS if key in state}
+        self.times = {key: _time(state[key]) for key in TIME_KEYS if key in state}
+        self.temperatures = {
+            key: tuple(_temperature(item) for item in state[key])
+            for key in TEMPERATURE_KEYS
+            if key in state
+        }
+        self.plate_steps = tuple(_value(item) for item in state.get("plateStep", ()))
+
+        eco_feedback = state.get("ecoFeedback")
+        self.eco_feedback = (
+            MieleEcoFeedback(eco_feedback) if eco_feedback is not None else None
+        )
+
+        # Keyed by state path, e.g. "remoteEnable.mobileStart".
+        self.signals = {key: bool(state[key]) for key in SIGNAL_KEYS if key in state}
+        for key, value in (state.get("remoteEnable") or {}).items():
+            self.signals["remoteEnable." + key] = bool(value)
+
+        self.light = state.get("light")
+        self.battery_level = state.get("batteryLevel")
+
+    @property
+    def status(self):
+        """Return the raw status code."""
+        return self.value("status").raw
+
+    def value(self, key):
+        return self.values.get(key) or MieleValue(None, None)
+
+    def seconds(self, key):
+        return self.times.get(key) or 0
@@ -0,0 +1,147 @@
+"""
+Catalog of the programs Miele appliances can start.
+"""
+import logging
+import time
+
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Catalogs change with firmware updates only, a week is plenty.
+CATALOG_TTL = 7 * 24 * 3600
+# Wait this long before fetching a catalog again that came back empty.
+FAILED_FETCH_RETRY = 300
+
+
+def catalog_key(device, lang):
+    """Return the catalog key of an appliance: model, firmware and language."""
+    return "{}/{}/{}".format(
+        device.tech_type or device.device_id, device.gateway_version, lang
+    )
+
+
+def _parse_programs(result):
+    """Return {programId: name} from a /programs response, None if malformed."""
+    if not isinstance(result, list):
+        return None
+
+    programs = {}
+    for item in result:
+        if isinstance(item, dict) and isinstance(item.get("programId"), int):
+            programs[item["programId"]] = item.get("program") or str(item["programId"])
+
+    return programs
+
+
+class MieleProgramCatalog(object):
+    """
+    Caches the programs of appliances, keyed by techType, firmware and language.
+
+    Appliances of the same model and firmware offer the same programs, so a
+    catalog is fetched once for all of them and kept for CATALOG_TTL in
+    memory and in Home Assistant storage. Catalogs are fetched when first
+    asked for and again when asked for after they expired, at most one fetch
+    per key at a time. A failed fetch keeps serving the expired catalog.
+
+    Appliances that are off or not remote controllable report no programs,
+    such empty catalogs are not kept and not asked for again during
+    FAILED_FETCH_RETRY seconds.
+    """
+
+    def __init__(self, hass, store, ttl=CATALOG_TTL):
+        self._hass = hass
+        self._store = store
+        self._ttl = ttl
+        self._catalogs = {}
+        self._fetches = {}
+        self._failed = {}
+
+        self.hit_count = 0
+        self.fetch_count = 0
+        self.failed_fetch_count = 0
+
+    async def async_load(self):
+        """Load the catalogs kept in storage."""
+        for key, catalog in (await self._store.async_load()).items():
+            self._catalogs[key] = (
+                catalog["fetched"],
+                {program_id: name for program_id, name in catalog["programs"]},
+            )
+
+    def _as_storage(self):
+        return {
+            key: {"fetched": fetched, "programs": list(programs.items())}
+            for key, (fetched, programs) in self._catalogs.items()
+        }
+
+    def programs(self, device, lang):
+        """Return the cached programs of an appliance as {programId: name}."""
+        catalog = self._catalogs.get(catalog_key(device, lang))
+        if catalog is None:
+            return None
+        return catalog[1]
+
+    def is_fresh(self, device, lang):
+        """Check whether the catalog of an appliance is cached and not expired."""
+        catalog = self._catalogs.get(catalog_key(device, lang))
+        return catalog is not None and time.time() - catalog[0] < self._ttl
+
+    async def async_get(self, client, device, lang, retry_failed=False):
+        """Return the programs of an appliance, fetching them if needed.
+
+        Returns None if the catalog was never fetched successfully. With
+        retry_failed a catalog that came back empty is fetched again right
+        away.
+        """
+        if self.is_fresh(device, lang):
+            self.hit_count += 1
+            return self.programs(device, lang)
+
+        key = catalog_key(device, lang)
+        if not retry_failed and time.monotonic() < self._failed.get(key, 0):
+            return self.programs(device, lang)
+
+        fetch = self._fetches.get(key)
+        if fetch is None:
+            fetch = self._hass.async_create_task(
+                self._async_fetch(key, client, device.device_id, lang)
+            )
+            self._fetches[key] = fetch
+            fetch.add_done_callback(lambda _: self._fetches.pop(key, None))
+
+        await fetch
+        return self.programs(device, lang)
+
+    async def _async_fetch(self, key, client, device_id, lang):
+        self.fetch_count += 1
+        programs = _parse_programs(await client.get_programs(device_id, lang))
+        if not programs:
+            self.failed_fetch_count += 1
+            self._failed[key] = time.monotonic() + FAILED_FETCH_RETRY
+            _LOGGER.debug("No Miele program catalog {}".format(key))
+            return
+
+        _LOGGER.debug(
+            "Fetched Miele program catalog {} with {} programs".format(
+                key, len(programs)
+            )
+        )
+        self._failed.pop(key, None)
+        self._catalogs[key] = (time.time(), programs)
+        self._async_save()
+
+    @callback
+    def _async_save(self):
+        self._store.async_save(self._as_storage)
+
+    def as_dict(self):
+        return {
+            "catalogs": {
+                key: len(programs)
+                for key, (fetched, programs) in self._catalogs.items()
+            },
+            "hits": self.hit_count,
+            "fetches": self.fetch_count,
+            "failed_fetches": self.failed_fetch_count,
+        }
@@ -0,0 +1,159 @@
+"""
+Index of the entities of the Miele integration.
+"""
+import logging
+
+from homeassistant.core import callback
+
+from .const import DATA_APPLIANCES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MieleEntityRegistry(object):
+    """
+    Holds the entities of a Miele account, grouped by device fabNumber.
+
+    Every platform adds a factory that creates its entities for an appliance.
+    The registry creates the entities of all platforms for appliances that
+    appear, registers them in bulk and forgets them again when the appliance
+    vanishes or the integration unloads. The entities it creates get the
+    account data as their account. Entities are keyed by the domain of their
+    platform and their unique_id within their device, unique_ids are only
+    unique per platform: the appliance, its light and its fan share the
+    fabNumber.
+
+    Entities also index themselves by entity_id once they are added to Home
+    Assistant, and leave the registry when they are removed from it.
+
+    owners maps fabNumbers to the account that created their entities and is
+    shared by the registries of all accounts. An appliance that several
+    accounts can see gets entities in the account that found it first only,
+    their unique_ids would collide otherwise.
+    """
+
+    def __init__(self, hass, account, account_id, owners):
+        self._hass = hass
+        self._account = account
+        self._account_id = account_id
+        self._owners = owners
+        self._foreign = set()
+        self._platforms = []
+        self._by_device = {}
+        self._by_entity_id = {}
+
+    def __len__(self):
+        return sum(len(entities) for entities in self._by_device.values())
+
+    @property
+    def device_ids(self):
+        """Return the fabNumbers that have entities or belong to another account."""
+        return self._by_device.keys() | self._foreign
+
+    @callback
+    def async_add_platform(self, domain, factory, async_add_entities):
+        """Create entities with factory(hass, device) for present and new appliances."""
+        self._platforms.append((domain, factory, async_add_entities))
+        self._async_create_entities(
+            domain,
+            factory,
+            async_add_entities,
+            self._account[DATA_APPLIANCES].values(),
+        )
+
+    @callback
+    def async_add_appliances(self, devices):
+        """Create the entities of all platforms for new appliances."""
+        for domain, factory, async_add_entities in self._platforms:
+            self._async_create_entities(domain, factory, async_add_entities, devices)
+
+    @callback
+    def _async_create_entities(self, domain, factory, async_add_entities, devices):
+        entities = []
+        for device in devices:
+            if not self._async_claim(device.device_id):
+                continue
+
+            device_entities = factory(self._hass, device)
+            group = self._by_device.setdefault(device.device_id, {})
+            for entity in device_entities:
+                entity.account = self._account
+                group[(domain, entity.unique_id)] = entity
+            entities.extend(device_entities)
+
+        if entities:
+            async_add_entities(entities)
+
+    @callback
+    def _async_claim(self, device_id):
+        owner = self._owners.setdefault(device_id, self._account_id)
+        if owner == self._account_id:
+            return True
+
+        if device_id not in self._foreign:
+            self._foreign.add(device_id)
+            _LOGGER.warning(
+                "Miele appliance {} is already linked through another account, "
+                "skipping it".format(device_id)
+            )
+        return False
+
+    @callback
+    def async_remove_appliances(self, device_ids):
+        """Forget the entities of appliances and return them."""
+        removed = []
+        for device_id in device_ids:
+            removed.extend(self._by_device.pop(device_id, {}).values())
+            self._foreign.discard(device_id)
+            if self._owners.get(device_id) == self._account_id:
+                del self._owners[device_id]
+
+        for entity in removed:
+            if self._by_entity_id.get(entity.entity_id) is entity:
+                del self._by_entity_id[entity.entity_id]
+
+        return removed
+
+    @callback
+    def async_unload(self):
+        """Forget all entities and platforms, returns the entities."""
+        removed = self.async_remove_appliances(list(self.device_ids))
+        self._platforms.clear()
+        return removed
+
+    @callback
+    def async_add(self, entity):
+        """Index an entity that was added to Home Assistant by its entity_id."""
+        self._by_entity_id[entity.entity_id] = entity
+
+    @callback
+    def async_remove(self, entity):
+        """Drop an entity that was removed from Home Assistant."""
+        self._by_entity_id.pop(entity.entity_id, None)
+        device_entities = self._by_device.get(entity.device_id, {})
+        for key, other in list(device_entities.items()):
+            if other is entity:
+                del device_entities[key]
+        if not device_entities:
+            self._by_device.pop(entity.device_id, None)
+
+    def entity(self, entity_id):
+        return self._by_entity_id.get(entity_id)
+
+    def device_entities(self, device_id):
+        """Return the entities of a device, keyed by (domain, unique_id)."""
+        return self._by_device.get(device_id, {})
+
+    def resolve_device_ids(self, entity_ids=(), device_ids=()):
+        """Return the fabNumbers targeted by entity and device ids, each once."""
+        result = {}
+        for entity_id in entity_ids:
+            entity = self._by_entity_id.get(entity_id)
+            if entity is not None:
+                result[entity.device_id] = None
+
+        for device_id in device_ids:
+            if device_id in self._by_device:
+                result[device_id] = None
+
+        return list(result)
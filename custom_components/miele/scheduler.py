@@ -0,0 +1,173 @@
+"""
+Adaptive polling for Miele devices.
+"""
+import asyncio
+import functools
+import logging
+import random
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import RUNNING_STATUSES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MieleAccountPoll(object):
+    """
+    Polls fast while an appliance of an account is busy and slowly while all
+    are idle.
+    """
+
+    # Poll this long after a predicted program end or delayed start.
+    WAKEUP_MARGIN = 5
+
+    def __init__(self, refresh, devices, min_interval, max_interval, rate_limiter):
+        self.refresh = refresh
+        self.devices = devices
+        self.rate_limiter = rate_limiter
+        self.due = None
+        self.unsub = None
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._last_states = {}
+
+    def next_interval(self):
+        """Return the number of seconds until the next poll."""
+        interval = self._max_interval
+        last_states = {}
+        for device_id, device in self.devices().items():
+            status = device.status
+            phase = device.value("programPhase").raw
+            last_states[device_id] = (status, phase)
+
+            previous = self._last_states.get(device_id)
+            if status in RUNNING_STATUSES or (
+                previous is not None and previous != (status, phase)
+            ):
+                interval = self._min_interval
+                continue
+
+            for key in ("remainingTime", "startTime"):
+                seconds = device.seconds(key)
+                if seconds > 0:
+                    interval = min(interval, seconds + self.WAKEUP_MARGIN)
+
+        self._last_states = last_states
+        return max(interval, self._min_interval)
+
+
+class MieleRefreshScheduler(object):
+    """
+    Polls every Miele account at its own adaptive interval.
+
+    Polls are delayed by a random jitter of up to JITTER of their interval
+    and kept SPACING seconds apart from the polls of other accounts, so
+    accounts set up together do not poll together. With a rate limiter, the
+    intervals of an account are stretched while its request budget runs low.
+    """
+
+    JITTER = 0.1
+    SPACING = 2
+
+    def __init__(self, hass):
+        self._hass = hass
+        self._accounts = {}
+        self._stopped = False
+
+    @callback
+    def add_account(
+        self,
+        account_id,
+        refresh,
+        devices,
+        min_interval,
+        max_interval,
+        rate_limiter=None,
+    ):
+        """Start polling an account, returns a function that stops it."""
+        account = MieleAccountPoll(
+            refresh, devices, min_interval, max_interval, rate_limiter
+        )
+        self._accounts[account_id] = account
+        self._schedule(account_id, account.next_interval())
+        return functools.partial(self._remove_account, account_id)
+
+    @callback
+    def _remove_account(self, account_id):
+        account = self._accounts.pop(account_id, None)
+        if account is not None:
+            self._cancel(account)
+
+    @callback
+    def stop(self, event=None):
+        self._stopped = True
+        for account in self._accounts.values():
+            self._cancel(account)
+
+    async def async_refresh_now(self, account_ids=None):
+        """Poll the accounts, all of them if account_ids is None, right away."""
+        if account_ids is None:
+            account_ids = list(self._accounts)
+
+        runs = []
+        for account_id in account_ids:
+            account = self._accounts.get(account_id)
+            if account is not None:
+                self._cancel(account)
+                runs.append(self._run(account_id))
+
+        await asyncio.gather(*runs)
+
+    @callback
+    def _cancel(self, account):
+        if account.unsub is not None:
+            account.unsub()
+            account.unsub = None
+        account.due = None
+
+    @callback
+    def _schedule(self, account_id, interval):
+        if self._stopped or account_id not in self._accounts:
+            return
+
+        account = self._accounts[account_id]
+        if account.rate_limiter is not None:
+            stretched = account.rate_limiter.stretch_interval(interval)
+            if stretched > interval:
+                _LOGGER.debug(
+                    "Miele API budget of {} low, stretching poll interval to {:.0f}s".format(
+                        account_id, stretched
+                    )
+                )
+                interval = stretched
+
+        now = self._hass.loop.time()
+        due = now + interval + random.uniform(0, interval * self.JITTER)
+        for other in sorted(
+            other.due
+            for other in self._accounts.values()
+            if other is not account and other.due is not None
+        ):
+            if other - self.SPACING < due < other + self.SPACING:
+                due = other + self.SPACING
+
+        _LOGGER.debug("Next Miele poll of {} in {:.1f}s".format(account_id, due - now))
+        account.due = due
+        account.unsub = async_call_later(
+            self._hass, due - now, functools.partial(self._run, account_id)
+        )
+
+    async def _run(self, account_id, now=None):
+        account = self._accounts.get(account_id)
+        if account is None:
+            return
+
+        account.unsub = None
+        account.due = None
+        try:
+            await account.refresh()
+        finally:
+            if account.unsub is None and self._accounts.get(account_id) is account:
+                self._schedule(account_id, account.next_interval())
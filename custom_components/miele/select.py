@@ -0,0 +1,134 @@
+import logging
+
+from homeassistant.components.select import DOMAIN as SELECT_DOMAIN
+from homeassistant.components.select import SelectEntity
+from homeassistant.core import callback
+
+from custom_components.miele import (
+    DATA_ACCOUNTS,
+    DATA_CLIENT,
+    DATA_COORDINATOR,
+    DATA_PROGRAMS,
+    DATA_REGISTRY,
+)
+from custom_components.miele import DOMAIN as MIELE_DOMAIN
+from custom_components.miele.entity import MieleEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Washing machines, dryers, dishwashers, ovens, steam ovens and coffee systems.
+SUPPORTED_TYPES = [1, 2, 7, 12, 13, 15, 17, 24, 31, 45, 67]
+
+
+# pylint: disable=W0612
+async def async_setup_entry(hass, entry, async_add_entities):
+    account = hass.data[MIELE_DOMAIN][DATA_ACCOUNTS][entry.entry_id]
+    account[DATA_REGISTRY].async_add_platform(
+        SELECT_DOMAIN, _create_selects, async_add_entities
+    )
+
+
+def _create_selects(hass, device):
+    if device.device_type in SUPPORTED_TYPES:
+        return [MieleProgramSelect(hass, device)]
+    return []
+
+
+class MieleProgramSelect(MieleEntity, SelectEntity):
+    """
+    Offers the programs in the catalog of the appliance, selecting one
+    starts it.
+
+    The catalog is fetched when the entity is added and again when the
+    appliance is updated after the catalog expired. Appliances that are off
+    report no programs, switching them on changes their status, which loads
+    the catalog again.
+    """
+
+    def __init__(self, hass, device):
+        self._hass = hass
+        self._device = device
+        self._watched_keys = {"status", "ProgramID"}
+        self._programs = {}
+        self._loading = None
+        self._status = device.status
+
+    @property
+    def unique_id(self):
+        """Return the unique ID for this select."""
+        return "{}_program".format(self.device_id)
+
+    @property
+    def name(self):
+        """Return the name of the select."""
+        return "{} Program".format(self._device.name)
+
+    @property
+    def icon(self):
+        return "mdi:format-list-bulleted"
+
+    @property
+    def options(self):
+        return list(self._programs)
+
+    @property
+    def current_option(self):
+        program_id = self._device.value("ProgramID").raw
+        for option, option_id in self._programs.items():
+            if option_id == program_id:
+                return option
+        return None
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._async_schedule_load()
+
+    @callback
+    def async_update_appliance(self, device):
+        super().async_update_appliance(device)
+        # An appliance switched on may offer programs it did not offer before.
+        status_changed = self._device.status != self._status
+        self._status = self._device.status
+
+        catalog = self.hass.data[MIELE_DOMAIN][DATA_PROGRAMS]
+        if not self._programs or not catalog.is_fresh(self._device, self._lang):
+            self._async_schedule_load(retry_failed=status_changed)
+
+    @callback
+    def _async_schedule_load(self, retry_failed=False):
+        if self._loading is None or self._loading.done():
+            self._loading = self.hass.async_create_task(
+                self._async_load_programs(retry_failed)
+            )
+
+    @property
+    def _lang(self):
+        return self.account[DATA_COORDINATOR].lang
+
+    async def _async_load_programs(self, retry_failed=False):
+        catalog = self.hass.data[MIELE_DOMAIN][DATA_PROGRAMS]
+        programs = await catalog.async_get(
+            self.account[DATA_CLIENT], self._device, self._lang, retry_failed
+        )
+        if programs is None:
+            return
+
+        # Options are program names, made unique with the programId.
+        names = list(programs.values())
+        self._programs = {
+            (
+                name if names.count(name) == 1 else "{} ({})".format(name, program_id)
+            ): program_id
+            for program_id, name in programs.items()
+        }
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    async def async_select_option(self, option):
+        await self.hass.services.async_call(
+            MIELE_DOMAIN,
+            "start_program",
+            {"device_id": self.device_id, "program_id": self._programs[option]},
+            blocking=True,
+        )
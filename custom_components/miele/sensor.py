@@ -1,42 +1,39 @@
+import functools
 import logging
+import time
 from datetime import datetime, timedelta
 
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.util import dt as dt_util
 
-from homeassistant.helpers.entity import Entity
-
-from custom_components.miele import CAPABILITIES, DATA_DEVICES
+from custom_components.miele import DATA_ACCOUNTS, DATA_REGISTRY
 from custom_components.miele import DOMAIN as MIELE_DOMAIN
-
-PLATFORMS = ["miele"]
+from custom_components.miele.const import (
+    DATA_CLIENT,
+    DATA_OAUTH,
+    DATA_TELEMETRY,
+    RUNNING_STATUSES,
+    STATUS_NOT_CONNECTED,
+    TERMINATED_STATUSES,
+)
+from custom_components.miele.descriptors import (
+    MieleEntityDescriptor,
+    compile_descriptors,
+    create_entities,
+    entity_per_index,
+    single_entity,
+)
+from custom_components.miele.entity import MieleEntity
 
 _LOGGER = logging.getLogger(__name__)
 
-ALL_DEVICES = []
-
-# https://www.miele.com/developer/swagger-ui/swagger.html#/
-STATUS_OFF = 1
-STATUS_ON = 2
-STATUS_PROGRAMMED = 3
-STATUS_PROGRAMMED_WAITING_TO_START = 4
-STATUS_RUNNING = 5
-STATUS_PAUSE = 6
-STATUS_END_PROGRAMMED = 7
-STATUS_FAILURE = 8
-STATUS_PROGRAMME_INTERRUPTED = 9
-STATUS_IDLE = 10
-STATUS_RINSE_HOLD = 11
-STATUS_SERVICE = 12
-STATUS_SUPERFREEZING = 13
-STATUS_SUPERCOOLING = 14
-STATUS_SUPERHEATING = 15
-STATUS_SUPERCOOLING_SUPERFREEZING = 146
-STATUS_NOT_CONNECTED = 255
-
 
 def _map_key(key):
     if key == "status":
@@ -73,161 +70,43 @@ def _map_key(key):
         return "Water cons. forecast"
 
 
-def state_capability(type, state):
-    type_str = str(type)
-    if state in CAPABILITIES[type_str]:
-        return True
+# Status attributes taken from value_localized and value_raw.
+VALUE_ATTRIBUTES = (
+    ("ProgramID", "ProgramID", "rawProgramID"),
+    ("programType", "programType", "rawProgramType"),
+    ("programPhase", "programPhase", "rawProgramPhase"),
+    ("dryingStep", "dryingStep", "rawDryingStep"),
+    ("spinningSpeed", "spinningSpeed", "rawSpinningSpeed"),
+    ("ventilationStep", "ventilationStep", "rawVentilationStep"),
+)
 
 
 def _is_running(device_status):
-    return device_status in [
-        STATUS_RUNNING,
-        STATUS_PAUSE,
-        STATUS_END_PROGRAMMED,
-        STATUS_PROGRAMME_INTERRUPTED,
-        STATUS_RINSE_HOLD,
-    ]
+    return device_status in RUNNING_STATUSES
 
 
 def _is_terminated(device_status):
-    return device_status in [STATUS_END_PROGRAMMED, STATUS_PROGRAMME_INTERRUPTED]
-
-
-def _to_seconds(time_array):
-    if len(time_array) == 3:
-        return time_array[0] * 3600 + time_array[1] * 60 + time_array[2]
-    elif len(time_array) == 2:
-        return time_array[0] * 3600 + time_array[1] * 60
-    else:
-        return 0
+    return device_status in TERMINATED_STATUSES
 
 
 # pylint: disable=W0612
-def setup_platform(hass, config, add_devices, discovery_info=None):
-    global ALL_DEVICES
-
-    devices = hass.data[MIELE_DOMAIN][DATA_DEVICES]
-    for k, device in devices.items():
-        device_state = device["state"]
-        device_type = device["ident"]["type"]["value_raw"]
-
-        sensors = []
-        if "status" in device_state and state_capability(
-            type=device_type, state="status"
-        ):
-            sensors.append(MieleStatusSensor(hass, device, "status"))
-
-        if "ProgramID" in device_state and state_capability(
-            type=device_type, state="ProgramID"
-        ):
-            sensors.append(MieleTextSensor(hass, device, "ProgramID"))
-
-        if "programPhase" in device_state and state_capability(
-            type=device_type, state="programPhase"
-        ):
-            sensors.append(MieleTextSensor(hass, device, "programPhase"))
-
-        if "targetTemperature" in device_state and state_capability(
-            type=device_type, state="targetTemperature"
-        ):
-            for i, val in enumerate(device_state["targetTemperature"]):
-                sensors.append(
-                    MieleTemperatureSensor(hass, device, "targetTemperature", i)
-                )
-
-        # washer, washer-dryer and dishwasher only have first target temperarure sensor
-        if "targetTemperature" in device_state and state_capability(
-            type=device_type, state="targetTemperature.0"
-        ):
-            sensors.append(
-                MieleTemperatureSensor(hass, device, "targetTemperature", 0, True)
-            )
-
-        if "temperature" in device_state and state_capability(
-            type=device_type, state="temperature"
-        ):
-            for i, val in enumerate(device_state["temperature"]):
-                sensors.append(MieleTemperatureSensor(hass, device, "temperature", i))
+async def async_setup_entry(hass, entry, async_add_entities):
+    account = hass.data[MIELE_DOMAIN][DATA_ACCOUNTS][entry.entry_id]
+    account[DATA_REGISTRY].async_add_platform(
+        SENSOR_DOMAIN,
+        functools.partial(create_entities, SENSOR_DESCRIPTORS),
+        async_add_entities,
+    )
 
-        if "dryingStep" in device_state and state_capability(
-            type=device_type, state="dryingStep"
-        ):
-            sensors.append(MieleTextSensor(hass, device, "dryingStep"))
+    async_add_entities([cls(hass, entry, account) for cls in TELEMETRY_SENSORS])
 
-        if "spinningSpeed" in device_state and state_capability(
-            type=device_type, state="spinningSpeed"
-        ):
-            sensors.append(MieleTextSensor(hass, device, "spinningSpeed"))
 
-        if "remainingTime" in device_state and state_capability(
-            type=device_type, state="remainingTime"
-        ):
-            sensors.append(MieleTimeSensor(hass, device, "remainingTime", True))
-        if "startTime" in device_state and state_capability(
-            type=device_type, state="startTime"
-        ):
-            sensors.append(MieleTimeSensor(hass, device, "startTime"))
-        if "elapsedTime" in device_state and state_capability(
-            type=device_type, state="elapsedTime"
-        ):
-            sensors.append(MieleTimeSensor(hass, device, "elapsedTime"))
-
-        if "ecoFeedback" in device_state and state_capability(
-            type=device_type, state="ecoFeedback.energyConsumption"
-        ):
-            sensors.append(
-                MieleConsumptionSensor(
-                    hass, device, "energyConsumption", "kWh", SensorDeviceClass.ENERGY
-                )
-            )
-
-        if "ecoFeedback" in device_state and state_capability(
-            type=device_type, state="ecoFeedback.waterConsumption"
-        ):
-            sensors.append(
-                MieleConsumptionForecastSensor(hass, device, "energyForecast")
-            )
-
-        if "ecoFeedback" in device_state and state_capability(
-            type=device_type, state="ecoFeedback.waterConsumption"
-        ):
-            sensors.append(
-                MieleConsumptionSensor(hass, device, "waterConsumption", "L", None)
-            )
-            sensors.append(
-                MieleConsumptionForecastSensor(hass, device, "waterForecast")
-            )
-
-        if "batteryLevel" in device_state and state_capability(
-            type=device_type, state="batteryLevel"
-        ):
-            sensors.append(MieleBatterySensor(hass, device, "batteryLevel"))
-
-        add_devices(sensors)
-        ALL_DEVICES = ALL_DEVICES + sensors
-
-
-def update_device_state():
-    for device in ALL_DEVICES:
-        try:
-            device.async_schedule_update_ha_state(True)
-        except (AssertionError, AttributeError):
-            _LOGGER.debug(
-                "Component most likely is disabled manually, if not please report to developer"
-                "{}".format(device.entity_id)
-            )
-
-
-class MieleRawSensor(Entity):
+class MieleRawSensor(MieleEntity):
     def __init__(self, hass, device, key):
         self._hass = hass
         self._device = device
         self._key = key
-
-    @property
-    def device_id(self):
-        """Return the unique ID for this sensor."""
-        return self._device["ident"]["deviceIdentLabel"]["fabNumber"]
+        self._watched_keys = {key}
 
     @property
     def unique_id(self):
@@ -237,37 +116,21 @@ class MieleRawSensor(Entity):
     @property
     def name(self):
         """Return the name of the sensor."""
-        ident = self._device["ident"]
-
-        result = ident["deviceName"]
-        if len(result) == 0:
-            return ident["type"]["value_localized"] + " " + _map_key(self._key)
-        else:
-            return result + " " + _map_key(self._key)
+        return self._device.name + " " + _map_key(self._key)
 
     @property
     def state(self):
         """Return the state of the sensor."""
 
-        return self._device["state"][self._key]["value_raw"]
-
-    async def async_update(self):
-        if not self.device_id in self._hass.data[MIELE_DOMAIN][DATA_DEVICES]:
-            _LOGGER.debug("Miele device disappeared: {}".format(self.device_id))
-        else:
-            self._device = self._hass.data[MIELE_DOMAIN][DATA_DEVICES][self.device_id]
+        return self._device.value(self._key).raw
 
 
-class MieleSensorEntity(SensorEntity):
+class MieleSensorEntity(MieleEntity, SensorEntity):
     def __init__(self, hass, device, key):
         self._hass = hass
         self._device = device
         self._key = key
-
-    @property
-    def device_id(self):
-        """Return the unique ID for this sensor."""
-        return self._device["ident"]["deviceIdentLabel"]["fabNumber"]
+        self._watched_keys = {key}
 
     @property
     def unique_id(self):
@@ -277,110 +140,67 @@ class MieleSensorEntity(SensorEntity):
     @property
     def name(self):
         """Return the name of the sensor."""
-        ident = self._device["ident"]
-
-        result = ident["deviceName"]
-        if len(result) == 0:
-            return ident["type"]["value_localized"] + " " + _map_key(self._key)
-        else:
-            return result + " " + _map_key(self._key)
-
-    async def async_update(self):
-        if not self.device_id in self._hass.data[MIELE_DOMAIN][DATA_DEVICES]:
-            _LOGGER.debug("Miele device disappeared: {}".format(self.device_id))
-        else:
-            self._device = self._hass.data[MIELE_DOMAIN][DATA_DEVICES][self.device_id]
+        return self._device.name + " " + _map_key(self._key)
 
 
 class MieleStatusSensor(MieleRawSensor):
+    def __init__(self, hass, device, key):
+        super().__init__(hass, device, key)
+        # The attributes are derived from most of the device state.
+        self._watched_keys = None
+
     @property
     def state(self):
         """Return the state of the sensor."""
-        result = self._device["state"]["status"]["value_localized"]
+        status = self._device.value("status")
+        result = status.localized
         if result == None:
-            result = self._device["state"]["status"]["value_raw"]
+            result = status.raw
 
         return result
 
     @property
     def extra_state_attributes(self):
         """Attributes."""
-        device_state = self._device["state"]
+        device = self._device
 
         attributes = {}
-        if "ProgramID" in device_state:
-            attributes["ProgramID"] = device_state["ProgramID"]["value_localized"]
-            attributes["rawProgramID"] = device_state["ProgramID"]["value_raw"]
-
-        if "programType" in device_state:
-            attributes["programType"] = device_state["programType"]["value_localized"]
-            attributes["rawProgramType"] = device_state["programType"]["value_raw"]
-
-        if "programPhase" in device_state:
-            attributes["programPhase"] = device_state["programPhase"]["value_localized"]
-            attributes["rawProgramPhase"] = device_state["programPhase"]["value_raw"]
-
-        if "dryingStep" in device_state:
-            attributes["dryingStep"] = device_state["dryingStep"]["value_localized"]
-            attributes["rawDryingStep"] = device_state["dryingStep"]["value_raw"]
-
-        if "spinningSpeed" in device_state:
-            attributes["spinningSpeed"] = device_state["spinningSpeed"][
-                "value_localized"
-            ]
-            attributes["rawSpinningSpeed"] = device_state["spinningSpeed"]["value_raw"]
-
-        if "ventilationStep" in device_state:
-            attributes["ventilationStep"] = device_state["ventilationStep"][
-                "value_localized"
-            ]
-            attributes["rawVentilationStep"] = device_state["ventilationStep"][
-                "value_raw"
-            ]
-
-        if "plateStep" in device_state:
-            plate_steps = 1
-            for plateStep in device_state["plateStep"]:
-                attributes["plateStep" + str(plate_steps)] = plateStep[
-                    "value_localized"
-                ]
-                attributes["rawPlateStep" + str(plate_steps)] = plateStep["value_raw"]
-                plate_steps += 1
-
-        if "ecoFeedback" in device_state and device_state["ecoFeedback"] is not None:
-            if "currentWaterConsumption" in device_state["ecoFeedback"]:
-                attributes["currentWaterConsumption"] = device_state["ecoFeedback"][
-                    "currentWaterConsumption"
-                ]["value"]
-                attributes["currentWaterConsumptionUnit"] = device_state["ecoFeedback"][
+        for key, attribute, raw_attribute in VALUE_ATTRIBUTES:
+            if key in device.values:
+                attributes[attribute] = device.values[key].localized
+                attributes[raw_attribute] = device.values[key].raw
+
+        for plate_steps, plate_step in enumerate(device.plate_steps, 1):
+            attributes["plateStep" + str(plate_steps)] = plate_step.localized
+            attributes["rawPlateStep" + str(plate_steps)] = plate_step.raw
+
+        eco_feedback = device.eco_feedback
+        if eco_feedback is not None:
+            if eco_feedback.water_consumption is not None:
+                attributes[
                     "currentWaterConsumption"
-                ]["unit"]
-            if "currentEnergyConsumption" in device_state["ecoFeedback"]:
-                attributes["currentEnergyConsumption"] = device_state["ecoFeedback"][
+                ] = eco_feedback.water_consumption.value
+                attributes[
+                    "currentWaterConsumptionUnit"
+                ] = eco_feedback.water_consumption.unit
+            if eco_feedback.energy_consumption is not None:
+                attributes[
                     "currentEnergyConsumption"
-                ]["value"]
-                attributes["currentEnergyConsumptionUnit"] = device_state[
-                    "ecoFeedback"
-                ]["currentEnergyConsumption"]["unit"]
-            if "waterForecast" in device_state["ecoFeedback"]:
-                attributes["waterForecast"] = device_state["ecoFeedback"][
-                    "waterForecast"
-                ]
-            if "energyForecast" in device_state["ecoFeedback"]:
-                attributes["energyForecast"] = device_state["ecoFeedback"][
-                    "energyForecast"
-                ]
+                ] = eco_feedback.energy_consumption.value
+                attributes[
+                    "currentEnergyConsumptionUnit"
+                ] = eco_feedback.energy_consumption.unit
+            if eco_feedback.water_forecast is not None:
+                attributes["waterForecast"] = eco_feedback.water_forecast
+            if eco_feedback.energy_forecast is not None:
+                attributes["energyForecast"] = eco_feedback.energy_forecast
 
         # Programs will only be running of both remainingTime and elapsedTime indicate
         # a value > 0
-        if "remainingTime" in device_state and "elapsedTime" in device_state:
-            remainingTime = _to_seconds(device_state["remainingTime"])
-            elapsedTime = _to_seconds(device_state["elapsedTime"])
-
-            if "startTime" in device_state:
-                startTime = _to_seconds(device_state["startTime"])
-            else:
-                startTime = 0
+        if "remainingTime" in device.times and "elapsedTime" in device.times:
+            remainingTime = device.seconds("remainingTime")
+            elapsedTime = device.seconds("elapsedTime")
+            startTime = device.seconds("startTime")
 
             # Calculate progress
             if (elapsedTime + remainingTime) == 0:
@@ -421,6 +241,7 @@ class MieleConsumptionSensor(MieleSensorEntity):
         super().__init__(hass, device, key)
 
         self._attr_native_unit_of_measurement = measurement
+        self._watched_keys = {"status", "ecoFeedback"}
         self._cached_consumption = -1
         self._attr_state_class = SensorStateClass.TOTAL_INCREASING
         self._attr_device_class = device_class
@@ -428,8 +249,8 @@ class MieleConsumptionSensor(MieleSensorEntity):
     @property
     def state(self):
         """Return the state of the sensor."""
-        device_state = self._device["state"]
-        device_status_value = self._device["state"]["status"]["value_raw"]
+        eco_feedback = self._device.eco_feedback
+        device_status_value = self._device.status
 
         if (
             not _is_running(device_status_value)
@@ -439,11 +260,7 @@ class MieleConsumptionSensor(MieleSensorEntity):
             return 0
 
         if self._cached_consumption >= 0:
-            if (
-                "ecoFeedback" not in device_state
-                or device_state["ecoFeedback"] is None
-                or device_status_value == STATUS_NOT_CONNECTED
-            ):
+            if eco_feedback is None or device_status_value == STATUS_NOT_CONNECTED:
                 # Sometimes the Miele API seems to return a null ecoFeedback
                 # object even though the Miele device is running. Or if the the
                 # Miele device has lost the connection to the Miele cloud, the
@@ -453,27 +270,26 @@ class MieleConsumptionSensor(MieleSensorEntity):
                 # sensor would be messed up.
                 return self._cached_consumption
 
+        # Until a program reports its consumption, it has not consumed anything.
+        if eco_feedback is None:
+            return max(self._cached_consumption, 0)
+
         consumption = 0
         if self._key == "energyConsumption":
-            if "currentEnergyConsumption" in device_state["ecoFeedback"]:
-                consumption_container = device_state["ecoFeedback"][
-                    "currentEnergyConsumption"
-                ]
-
-                if consumption_container["unit"] == "kWh":
-                    consumption = consumption_container["value"]
-                elif consumption_container["unit"] == "Wh":
-                    consumption = consumption_container["value"] / 1000.0
+            consumption_container = eco_feedback.energy_consumption
+            if consumption_container is not None:
+                if consumption_container.unit == "kWh":
+                    consumption = consumption_container.value
+                elif consumption_container.unit == "Wh":
+                    consumption = consumption_container.value / 1000.0
             else:
-                return self._cached_consumption
+                return max(self._cached_consumption, 0)
 
         elif self._key == "waterConsumption":
-            if "currentWaterConsumption" in device_state["ecoFeedback"]:
-                consumption = device_state["ecoFeedback"]["currentWaterConsumption"][
-                    "value"
-                ]
+            if eco_feedback.water_consumption is not None:
+                consumption = eco_feedback.water_consumption.value
             else:
-                return self._cached_consumption
+                return max(self._cached_consumption, 0)
 
         self._cached_consumption = consumption
         return consumption
@@ -482,6 +298,7 @@ class MieleConsumptionSensor(MieleSensorEntity):
 class MieleTimeSensor(MieleRawSensor):
     def __init__(self, hass, device, key, decreasing=False):
         super().__init__(hass, device, key)
+        self._watched_keys = {key, "status"}
         self._init_value = "--:--"
         self._cached_time = self._init_value
         self._decreasing = decreasing
@@ -489,11 +306,13 @@ class MieleTimeSensor(MieleRawSensor):
     @property
     def state(self):
         """Return the state of the sensor."""
-        state_value = self._device["state"][self._key]
-        device_status_value = self._device["state"]["status"]["value_raw"]
+        seconds = self._device.times.get(self._key)
+        device_status_value = self._device.status
         formatted_value = None
-        if len(state_value) == 2:
-            formatted_value = "{:02d}:{:02d}".format(state_value[0], state_value[1])
+        if seconds is not None:
+            formatted_value = "{:02d}:{:02d}".format(
+                seconds // 3600, seconds % 3600 // 60
+            )
 
         if (
             not _is_running(device_status_value)
@@ -519,18 +338,14 @@ class MieleTimeSensor(MieleRawSensor):
         return formatted_value
 
 
-class MieleTemperatureSensor(Entity):
+class MieleTemperatureSensor(MieleEntity):
     def __init__(self, hass, device, key, index, force_int=False):
         self._hass = hass
         self._device = device
         self._key = key
         self._index = index
         self._force_int = force_int
-
-    @property
-    def device_id(self):
-        """Return the unique ID for this sensor."""
-        return self._device["ident"]["deviceIdentLabel"]["fabNumber"]
+        self._watched_keys = {key}
 
     @property
     def unique_id(self):
@@ -540,51 +355,41 @@ class MieleTemperatureSensor(Entity):
     @property
     def name(self):
         """Return the name of the sensor."""
-        ident = self._device["ident"]
+        return "{} {} {}".format(self._device.name, _map_key(self._key), self._index)
 
-        result = ident["deviceName"]
-        if len(result) == 0:
-            return "{} {} {}".format(
-                ident["type"]["value_localized"], _map_key(self._key), self._index
-            )
-        else:
-            return "{} {} {}".format(result, _map_key(self._key), self._index)
+    @property
+    def _temperature(self):
+        return self._device.temperatures[self._key][self._index]
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        state_value = self._device["state"][self._key][self._index]["value_raw"]
-        if state_value == -32768:
+        state_value = self._temperature.value
+        if state_value is None:
             return None
         elif self._force_int:
-            return int(state_value / 100)
+            return int(state_value)
         else:
-            return state_value / 100
+            return state_value
 
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement of this entity, if any."""
-        if self._device["state"][self._key][self._index]["unit"] == "Celsius":
+        if self._temperature.unit == "Celsius":
             return "°C"
-        elif self._device["state"][self._key][self._index]["unit"] == "Fahrenheit":
+        elif self._temperature.unit == "Fahrenheit":
             return "°F"
 
     @property
     def device_class(self):
         return "temperature"
 
-    async def async_update(self):
-        if not self.device_id in self._hass.data[MIELE_DOMAIN][DATA_DEVICES]:
-            _LOGGER.debug(" Miele device disappeared: {}".format(self.device_id))
-        else:
-            self._device = self._hass.data[MIELE_DOMAIN][DATA_DEVICES][self.device_id]
-
 
 class MieleTextSensor(MieleRawSensor):
     @property
     def state(self):
         """Return the state of the sensor."""
-        result = self._device["state"][self._key]["value_localized"]
+        result = self._device.value(self._key).localized
         if result == "":
             result = None
 
@@ -600,24 +405,304 @@ class MieleBatterySensor(MieleSensorEntity):
 
     @property
     def state(self):
-        return self._device["state"][self._key]
+        return self._device.battery_level
 
 
 class MieleConsumptionForecastSensor(MieleSensorEntity):
     def __init__(self, hass, device, key):
         super().__init__(hass, device, key)
+        self._watched_keys = {"ecoFeedback"}
         self._attr_native_unit_of_measurement = "%"
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        device_state = self._device["state"]
+        eco_feedback = self._device.eco_feedback
+        if eco_feedback is None:
+            return None
+
+        if self._key == "energyForecast":
+            forecast = eco_feedback.energy_forecast
+        else:
+            forecast = eco_feedback.water_forecast
+
+        if forecast is not None:
+            return forecast * 100
+
+        return None
+
+
+class MieleTelemetrySensor(SensorEntity):
+    """
+    Diagnostic sensor on the Miele cloud requests of an account, written after
+    a poll at most every WRITE_INTERVAL seconds. It is named after the config
+    entry of the account and disabled by default.
+    """
+
+    # Polls run every few seconds, writing each would flood the recorder.
+    WRITE_INTERVAL = 60
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _last_write = None
 
+    def __init__(self, hass, entry, account, key, name):
+        self._hass = hass
+        self._account = account
+        self._telemetry = account[DATA_TELEMETRY]
+        self._attr_unique_id = "miele_telemetry_{}_{}".format(entry.entry_id, key)
+        self._attr_name = "{} {}".format(entry.title, name)
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(self._telemetry.add_listener(self._async_refreshed))
+
+    @callback
+    def _async_refreshed(self):
+        now = time.monotonic()
         if (
-            device_state["ecoFeedback"] is not None
-            and self._key in device_state["ecoFeedback"]
+            self._last_write is None
+            or now - self._last_write >= MieleTelemetrySensor.WRITE_INTERVAL
         ):
-            return device_state["ecoFeedback"][self._key] * 100
+            self._last_write = now
+            self.async_write_ha_state()
 
-        return None
+
+class MieleRequestsSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "requests", "API Requests")
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self):
+        return self._telemetry.request_count
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "status_{}".format(status): count
+            for status, count in self._telemetry.status_counts.items()
+        }
+
+
+class MieleErrorsSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "errors", "API Errors")
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self):
+        return self._telemetry.error_count
+
+    @property
+    def extra_state_attributes(self):
+        return {"unauthorized": self._telemetry.unauthorized_count}
+
+
+class MieleLatencySensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "latency", "API Latency")
+        self._attr_native_unit_of_measurement = "ms"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        latency = self._telemetry.mean_latency
+        if latency is None:
+            return None
+        return round(latency)
+
+    @property
+    def extra_state_attributes(self):
+        result = {}
+        for endpoint, histogram in self._telemetry.latency.items():
+            result["{} p95".format(endpoint)] = histogram.quantile(0.95)
+        return result
+
+
+class MieleTokenRefreshSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "token_refreshes", "Token Refreshes")
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self):
+        return self._account[DATA_OAUTH].refresh_count
+
+
+class MieleApiBudgetSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "api_budget", "API Budget Used")
+        self._attr_native_unit_of_measurement = "%"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def _rate_limiter(self):
+        return self._account[DATA_CLIENT].rate_limiter
+
+    @property
+    def native_value(self):
+        rate_limiter = self._rate_limiter
+        used = 1 - max(rate_limiter.tokens, 0) / rate_limiter.capacity
+        return round(used * 100)
+
+    @property
+    def extra_state_attributes(self):
+        rate_limiter = self._rate_limiter
+        return {
+            "requests_per_hour": round(rate_limiter.rate * 3600),
+            "available": int(rate_limiter.tokens),
+            "throttled": rate_limiter.throttled_count,
+            "rate_limited": rate_limiter.rate_limited_count,
+            "blocked_for": round(rate_limiter.blocked_for),
+        }
+
+
+class MieleRefreshDurationSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "refresh_duration", "Refresh Duration")
+        self._attr_native_unit_of_measurement = "ms"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        if self._telemetry.refresh_duration is None:
+            return None
+        return round(self._telemetry.refresh_duration * 1000)
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "refreshes": self._telemetry.refresh_count,
+            "failed_refreshes": self._telemetry.failed_refresh_count,
+        }
+
+
+class MieleEntitiesUpdatedSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "entities_updated", "Entities Updated")
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self):
+        return self._telemetry.entities_updated
+
+
+class MieleDownloadedSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "downloaded", "Data Downloaded")
+        self._attr_device_class = SensorDeviceClass.DATA_SIZE
+        self._attr_native_unit_of_measurement = "B"
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self):
+        return self._telemetry.bytes_downloaded
+
+
+class MieleLastRefreshSensor(MieleTelemetrySensor):
+    def __init__(self, hass, entry, account):
+        super().__init__(hass, entry, account, "last_refresh", "Last Refresh")
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    @property
+    def native_value(self):
+        if self._telemetry.last_success is None:
+            return None
+        return dt_util.utc_from_timestamp(self._telemetry.last_success)
+
+
+TELEMETRY_SENSORS = (
+    MieleRequestsSensor,
+    MieleErrorsSensor,
+    MieleLatencySensor,
+    MieleTokenRefreshSensor,
+    MieleApiBudgetSensor,
+    MieleRefreshDurationSensor,
+    MieleEntitiesUpdatedSensor,
+    MieleDownloadedSensor,
+    MieleLastRefreshSensor,
+)
+
+
+SENSOR_DESCRIPTORS = compile_descriptors(
+    (
+        MieleEntityDescriptor(
+            "status", "status", single_entity(MieleStatusSensor, "status")
+        ),
+        MieleEntityDescriptor(
+            "ProgramID", "ProgramID", single_entity(MieleTextSensor, "ProgramID")
+        ),
+        MieleEntityDescriptor(
+            "programPhase",
+            "programPhase",
+            single_entity(MieleTextSensor, "programPhase"),
+        ),
+        MieleEntityDescriptor(
+            "targetTemperature",
+            "targetTemperature",
+            entity_per_index(MieleTemperatureSensor, "targetTemperature"),
+        ),
+        # washer, washer-dryer and dishwasher only have first target temperarure sensor
+        MieleEntityDescriptor(
+            "targetTemperature",
+            "targetTemperature.0",
+            single_entity(MieleTemperatureSensor, "targetTemperature", 0, True),
+        ),
+        MieleEntityDescriptor(
+            "temperature",
+            "temperature",
+            entity_per_index(MieleTemperatureSensor, "temperature"),
+        ),
+        MieleEntityDescriptor(
+            "dryingStep", "dryingStep", single_entity(MieleTextSensor, "dryingStep")
+        ),
+        MieleEntityDescriptor(
+            "spinningSpeed",
+            "spinningSpeed",
+            single_entity(MieleTextSensor, "spinningSpeed"),
+        ),
+        MieleEntityDescriptor(
+            "remainingTime",
+            "remainingTime",
+            single_entity(MieleTimeSensor, "remainingTime", True),
+        ),
+        MieleEntityDescriptor(
+            "startTime", "startTime", single_entity(MieleTimeSensor, "startTime")
+        ),
+        MieleEntityDescriptor(
+            "elapsedTime", "elapsedTime", single_entity(MieleTimeSensor, "elapsedTime")
+        ),
+        MieleEntityDescriptor(
+            "ecoFeedback",
+            "ecoFeedback.energyConsumption",
+            single_entity(
+                MieleConsumptionSensor,
+                "energyConsumption",
+                "kWh",
+                SensorDeviceClass.ENERGY,
+            ),
+        ),
+        MieleEntityDescriptor(
+            "ecoFeedback",
+            "ecoFeedback.energyConsumption",
+            single_entity(MieleConsumptionForecastSensor, "energyForecast"),
+        ),
+        MieleEntityDescriptor(
+            "ecoFeedback",
+            "ecoFeedback.waterConsumption",
+            single_entity(MieleConsumptionSensor, "waterConsumption", "L", None),
+        ),
+        MieleEntityDescriptor(
+            "ecoFeedback",
+            "ecoFeedback.waterConsumption",
+            single_entity(MieleConsumptionForecastSensor, "waterForecast"),
+        ),
+        MieleEntityDescriptor(
+            "batteryLevel",
+            "batteryLevel",
+            single_entity(MieleBatterySensor, "batteryLevel"),
+        ),
+    )
+)
@@ -0,0 +1,148 @@
+"""
+Persistent storage for the Miele integration.
+"""
+import json
+import logging
+import os
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+
+from .const import CONF_TOKEN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+TOKEN_STORAGE_KEY = "miele.token"
+DEVICES_STORAGE_KEY = "miele.devices"
+PROGRAMS_STORAGE_KEY = "miele.programs"
+
+
+def _read_legacy_token(path):
+    try:
+        with open(path) as f:
+            return json.loads(f.read())
+    except (IOError, ValueError):
+        return None
+
+
+def _remove_legacy_token(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except IOError:
+        _LOGGER.warning("Couldn't delete token cache {0}".format(path))
+
+
+class MieleLegacyTokenStore(object):
+    """
+    Reads the OAuth token of the YAML configuration for its import.
+
+    Earlier versions kept the token in Home Assistant storage or, before
+    that, in a token cache file. Once the token is part of a config entry,
+    async_remove deletes both.
+    """
+
+    def __init__(self, hass, legacy_path):
+        self._hass = hass
+        self._legacy_path = legacy_path
+        self._store = Store(hass, STORAGE_VERSION, TOKEN_STORAGE_KEY, private=True)
+
+    async def async_load(self):
+        token = await self._store.async_load()
+        if token is None:
+            token = await self._hass.async_add_executor_job(
+                _read_legacy_token, self._legacy_path
+            )
+
+        return token
+
+    async def async_remove(self):
+        _LOGGER.info("Removing the imported Miele token caches")
+        await self._store.async_remove()
+        await self._hass.async_add_executor_job(_remove_legacy_token, self._legacy_path)
+
+
+class MieleEntryTokenStore(object):
+    """
+    Keeps the OAuth token in the data of a config entry.
+
+    save and remove may be called from executor threads as well as from the
+    event loop.
+    """
+
+    def __init__(self, hass, entry):
+        self._hass = hass
+        self._entry = entry
+
+    async def async_load(self):
+        return self._entry.data.get(CONF_TOKEN)
+
+    def save(self, token):
+        self._hass.loop.call_soon_threadsafe(self._async_update, token)
+
+    def remove(self):
+        self._hass.loop.call_soon_threadsafe(self._async_update, None)
+
+    @callback
+    def _async_update(self, token):
+        self._hass.config_entries.async_update_entry(
+            self._entry, data={**self._entry.data, CONF_TOKEN: token}
+        )
+
+
+def _compact_devices(devices):
+    # Actions are delivered again by the event stream, only keep what entities need.
+    return {
+        device_id: {"ident": device["ident"], "state": device["state"]}
+        for device_id, device in devices.items()
+    }
+
+
+class MieleDeviceStore(object):
+    """
+    Keeps a snapshot of the last known device state of a Miele account in
+    Home Assistant storage.
+
+    The snapshot lets the integration create its entities at startup without
+    waiting for the Miele cloud. Writes are coalesced and done off the event
+    loop by Store.
+    """
+
+    SAVE_DELAY = 30
+
+    def __init__(self, hass, account_id):
+        self._store = Store(
+            hass, STORAGE_VERSION, "{}.{}".format(DEVICES_STORAGE_KEY, account_id)
+        )
+
+    async def async_load(self):
+        devices = await self._store.async_load()
+        return devices or {}
+
+    @callback
+    def async_save(self, devices):
+        self._store.async_delay_save(
+            lambda: _compact_devices(devices), MieleDeviceStore.SAVE_DELAY
+        )
+
+    async def async_remove(self):
+        await self._store.async_remove()
+
+
+class MieleProgramStore(object):
+    """Keeps the program catalogs of appliance models in Home Assistant storage."""
+
+    SAVE_DELAY = 30
+
+    def __init__(self, hass):
+        self._store = Store(hass, STORAGE_VERSION, PROGRAMS_STORAGE_KEY)
+
+    async def async_load(self):
+        catalogs = await self._store.async_load()
+        return catalogs or {}
+
+    @callback
+    def async_save(self, data_func):
+        self._store.async_delay_save(data_func, MieleProgramStore.SAVE_DELAY)
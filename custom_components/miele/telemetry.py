@@ -0,0 +1,151 @@
+"""
+Instrumentation of the Miele integration.
+"""
+import bisect
+import time
+from collections import Counter
+
+# Upper bounds of the request latency buckets in milliseconds.
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+STATUS_ERROR = "error"
+
+
+class LatencyHistogram(object):
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, milliseconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+
+    @property
+    def mean(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket holding the q quantile."""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+
+        return None
+
+    def as_dict(self):
+        buckets = {
+            "<={}".format(bound): count
+            for bound, count in zip(LATENCY_BUCKETS, self.counts)
+        }
+        buckets[">{}".format(LATENCY_BUCKETS[-1])] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.mean,
+            "p95_ms": self.quantile(0.95),
+            "buckets": buckets,
+        }
+
+
+class MieleTelemetry(object):
+    """
+    Counts requests to the Miele cloud and measures refreshes.
+
+    MieleClient records every request and the coordinator every refresh.
+    Listeners are called after each refresh, so telemetry sensors are
+    written once per tick instead of once per request.
+    """
+
+    def __init__(self):
+        self.latency = {}
+        self.status_counts = Counter()
+        self.request_count = 0
+        self.error_count = 0
+        self.unauthorized_count = 0
+        self.bytes_downloaded = 0
+
+        self.refresh_count = 0
+        self.failed_refresh_count = 0
+        self.refresh_duration = None
+        self.entities_updated = None
+        self.last_success = None
+
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Call listener after every refresh, returns a function removing it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def record_request(self, endpoint, status, duration, size=0):
+        """Record a request, status is STATUS_ERROR if it got no response."""
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency[endpoint] = LatencyHistogram()
+        histogram.add(duration * 1000)
+
+        self.request_count += 1
+        self.status_counts[status] += 1
+        self.bytes_downloaded += size
+        if status == STATUS_ERROR or status >= 400:
+            self.error_count += 1
+        if status == 401:
+            self.unauthorized_count += 1
+
+    def record_refresh(self, duration, success, entities_updated=0):
+        self.refresh_count += 1
+        self.refresh_duration = duration
+        if success:
+            self.entities_updated = entities_updated
+            self.last_success = time.time()
+        else:
+            self.failed_refresh_count += 1
+
+        for listener in list(self._listeners):
+            listener()
+
+    @property
+    def mean_latency(self):
+        count = sum(histogram.count for histogram in self.latency.values())
+        if not count:
+            return None
+        return sum(histogram.total for histogram in self.latency.values()) / count
+
+    @property
+    def seconds_since_success(self):
+        if self.last_success is None:
+            return None
+        return time.time() - self.last_success
+
+    def as_dict(self):
+        return {
+            "requests": self.request_count,
+            "errors": self.error_count,
+            "unauthorized": self.unauthorized_count,
+            "status_counts": {
+                str(status): count for status, count in self.status_counts.items()
+            },
+            "bytes_downloaded": self.bytes_downloaded,
+            "latency": {
+                endpoint: histogram.as_dict()
+                for endpoint, histogram in self.latency.items()
+            },
+            "refreshes": self.refresh_count,
+            "failed_refreshes": self.failed_refresh_count,
+            "refresh_duration_ms": (
+                None if self.refresh_duration is None else self.refresh_duration * 1000
+            ),
+            "entities_updated": self.entities_updated,
+            "seconds_since_success": self.seconds_since_success,
+        }
@@ -0,0 +1,56 @@
+"""
+Recording of Miele cloud responses for replay.
+"""
+import gzip
+import json
+import logging
+import threading
+import time
+import zlib
+
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+_WRITE_LOCK = threading.Lock()
+
+
+def _append(path, line):
+    # Every record is a gzip member of its own, so the file stays readable
+    # up to the last complete record if Home Assistant stops mid-write.
+    with _WRITE_LOCK, gzip.open(path, "ab") as f:
+        f.write(line)
+
+
+def read_traffic(path):
+    """Yield timestamp, kind and payload of the records in a recording."""
+    with gzip.open(path, "rt") as f:
+        try:
+            for line in f:
+                record = json.loads(line)
+                yield record["t"], record["kind"], record["payload"]
+        except (EOFError, ValueError, gzip.BadGzipFile, zlib.error):
+            _LOGGER.warning("Recording {} ends with a partial record".format(path))
+
+
+class MieleTrafficRecorder(object):
+    """
+    Appends responses of the Miele cloud to a gzip JSON lines file.
+
+    Each line holds the time of the response, its kind and its payload.
+    Writes are done in the executor.
+    """
+
+    def __init__(self, hass, path):
+        self._hass = hass
+        self._path = path
+
+    @callback
+    def record(self, kind, payload):
+        line = json.dumps(
+            {"t": time.time(), "kind": kind, "payload": payload},
+            separators=(",", ":"),
+        )
+        self._hass.async_add_executor_job(
+            _append, self._path, (line + "\n").encode("utf-8")
+        )
@@ -0,0 +1,378 @@
+"""
+Benchmark for the refresh to entity state pipeline.
+
+Generates /v1/devices payloads for synthetic fleets covering the device
+types in CAPABILITIES and drives them through _to_dict, the coordinator,
+the async_setup_entry functions and the entity state reads, against a
+stubbed Home Assistant:
+
+    python tools/miele_benchmark.py --sizes 1 10 100 1000 --ticks 20
+
+For every fleet size it reports the latency and the peak allocations of
+each stage, and the state writes per refresh tick. Half of the appliances
+run a program, so every tick changes their times.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from importlib import import_module
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import custom_components.miele as miele  # noqa: E402
+from custom_components.miele.const import (  # noqa: E402
+    CAPABILITIES,
+    DATA_ACCOUNTS,
+    DATA_APPLIANCES,
+    DATA_COORDINATOR,
+    DATA_DEVICES,
+    DATA_PROGRAMS,
+    DATA_REGISTRY,
+    DATA_TELEMETRY,
+    DOMAIN,
+    STATUS_END_PROGRAMMED,
+    STATUS_OFF,
+    STATUS_RUNNING,
+)
+from custom_components.miele.coordinator import MieleCoordinator  # noqa: E402
+from custom_components.miele.coordinator import _to_dict  # noqa: E402
+from custom_components.miele.entity import MieleEntity  # noqa: E402
+from custom_components.miele.programs import MieleProgramCatalog  # noqa: E402
+from custom_components.miele.registry import MieleEntityRegistry  # noqa: E402
+from custom_components.miele.telemetry import MieleTelemetry  # noqa: E402
+
+DEFAULT_SIZES = [1, 10, 100, 1000]
+
+TYPE_NAMES = {
+    1: "Washing machine",
+    2: "Tumble dryer",
+    7: "Dishwasher",
+    12: "Oven",
+    13: "Oven Microwave",
+    14: "Hob Highlight",
+    15: "Steam Oven",
+    16: "Microwave",
+    17: "Coffee Maker",
+    18: "Hood",
+    19: "Fridge",
+    20: "Freezer",
+    21: "Fridge-/Freezer combination",
+}
+
+STATE_WRITES = [0]
+
+
+def _value(raw, localized):
+    return {"value_raw": raw, "value_localized": localized, "key_localized": "Key"}
+
+
+def _temperature(raw):
+    return {"value_raw": raw, "value_localized": raw / 100, "unit": "Celsius"}
+
+
+def _time(seconds):
+    return [seconds // 3600, seconds % 3600 // 60]
+
+
+def make_device(device_type, index, running):
+    """Return a /v1/devices entry as the Miele cloud sends it."""
+    status = STATUS_RUNNING if running else STATUS_OFF
+    return {
+        "ident": {
+            "type": _value(device_type, TYPE_NAMES.get(device_type, "Appliance")),
+            "deviceName": "" if index % 2 else "Appliance {}".format(index),
+            "protocolVersion": 4,
+            "deviceIdentLabel": {
+                "fabNumber": "{:012d}".format(index),
+                "fabIndex": "64",
+                "techType": "WWV980",
+                "matNumber": "11385640",
+                "swids": ["4164", "20456", "25213", "25037", "20300"],
+            },
+            "xkmIdentLabel": {"techType": "EK057", "releaseVersion": "08.32"},
+        },
+        "state": {
+            "ProgramID": _value(1 if running else 0, "Cottons" if running else ""),
+            "status": _value(status, "In use" if running else "Off"),
+            "programType": _value(0, "Operation mode"),
+            "programPhase": _value(260 if running else 0, "Main wash"),
+            "remainingTime": _time(7200 if running else 0),
+            "startTime": [0, 0],
+            "targetTemperature": [
+                _temperature(4000),
+                _temperature(-32768),
+                _temperature(-32768),
+            ],
+            "temperature": [
+                _temperature(3850),
+                _temperature(-32768),
+                _temperature(-32768),
+            ],
+            "signalInfo": False,
+            "signalFailure": False,
+            "signalDoor": not running,
+            "remoteEnable": {
+                "fullRemoteControl": True,
+                "smartGrid": False,
+                "mobileStart": running,
+            },
+            "ambientLight": None,
+            "light": 2,
+            "elapsedTime": _time(0),
+            "spinningSpeed": {
+                "value_raw": 1200,
+                "value_localized": "1200",
+                "unit": "rpm",
+            },
+            "dryingStep": _value(None, ""),
+            "ventilationStep": _value(None, ""),
+            "plateStep": (
+                [_value(0, "0") for _ in range(4)] if device_type == 14 else []
+            ),
+            "ecoFeedback": (
+                {
+                    "currentWaterConsumption": {"unit": "l", "value": 0},
+                    "currentEnergyConsumption": {"unit": "kWh", "value": 0},
+                    "energyForecast": 0.5,
+                    "waterForecast": 0.3,
+                }
+                if running
+                else None
+            ),
+            "batteryLevel": None,
+        },
+    }
+
+
+def make_fleet(size):
+    device_types = sorted(int(device_type) for device_type in CAPABILITIES)
+    return [
+        make_device(device_types[index % len(device_types)], index, index % 2 == 0)
+        for index in range(size)
+    ]
+
+
+def advance(fleet):
+    """Let every running appliance progress by one minute."""
+    for device in fleet:
+        state = device["state"]
+        if state["status"]["value_raw"] != STATUS_RUNNING:
+            continue
+
+        elapsed = state["elapsedTime"][0] * 3600 + state["elapsedTime"][1] * 60 + 60
+        remaining = max(7200 - elapsed, 0)
+        state["elapsedTime"] = _time(elapsed)
+        state["remainingTime"] = _time(remaining)
+        eco_feedback = state["ecoFeedback"]
+        eco_feedback["currentEnergyConsumption"]["value"] = round(elapsed / 7200, 2)
+        eco_feedback["currentWaterConsumption"]["value"] = elapsed // 120
+        if remaining == 0:
+            state["status"] = _value(STATUS_END_PROGRAMMED, "Finished")
+
+
+class StubHass(object):
+    def __init__(self, loop):
+        self.loop = loop
+        self.data = {}
+
+    def async_create_task(self, coro):
+        return self.loop.create_task(coro)
+
+
+class StubProgramStore(object):
+    async def async_load(self):
+        return {}
+
+    def async_save(self, data_func):
+        pass
+
+
+class StubEntry(object):
+    entry_id = "benchmark"
+    title = "Miele"
+
+
+class StubClient(object):
+    def __init__(self):
+        self.payload = []
+
+    def add_command_listener(self, listener):
+        pass
+
+    async def get_devices(self, lang):
+        return self.payload
+
+    async def get_programs(self, device_id, lang):
+        return [{"programId": 1, "program": "Cottons"}]
+
+
+def _write_ha_state(entity):
+    # What Home Assistant reads from an entity when its state is written.
+    STATE_WRITES[0] += 1
+    entity.state
+    entity.available
+    entity.extra_state_attributes
+
+
+async def _measure(stage, results, func):
+    """Run func once, timed, then once more to trace its allocations."""
+    start = time.perf_counter()
+    await func()
+    results.setdefault(stage, []).append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        await func()
+        results.setdefault(stage + ".alloc", []).append(
+            tracemalloc.get_traced_memory()[1]
+        )
+    finally:
+        tracemalloc.stop()
+
+
+def create_hass(loop):
+    """Return a stubbed hass for setup_entities."""
+    hass = StubHass(loop)
+    hass.data[DOMAIN] = {
+        DATA_ACCOUNTS: {},
+        DATA_PROGRAMS: MieleProgramCatalog(hass, StubProgramStore()),
+    }
+    return hass
+
+
+def get_coordinator(hass):
+    """Return the coordinator created by setup_entities."""
+    return hass.data[DOMAIN][DATA_ACCOUNTS][StubEntry.entry_id][DATA_COORDINATOR]
+
+
+async def setup_entities(hass, client):
+    """Fetch the devices and create all entities, as async_setup_entry does."""
+    account = {DATA_DEVICES: {}, DATA_APPLIANCES: {}, DATA_TELEMETRY: MieleTelemetry()}
+    registry = MieleEntityRegistry(hass, account, StubEntry.entry_id, {})
+    account[DATA_REGISTRY] = registry
+    coordinator = MieleCoordinator(
+        hass,
+        account,
+        client,
+        "en",
+        functools.partial(miele._update_entities, hass, account),
+    )
+    account[DATA_COORDINATOR] = coordinator
+    hass.data[DOMAIN][DATA_ACCOUNTS][StubEntry.entry_id] = account
+    await coordinator.async_refresh()
+
+    entities = []
+    registry.async_add_platform(
+        DOMAIN, functools.partial(miele.create_devices, client, "en"), entities.extend
+    )
+    for component in miele.MIELE_COMPONENTS:
+        platform = import_module("custom_components.miele." + component)
+        await platform.async_setup_entry(hass, StubEntry(), entities.extend)
+
+    # The telemetry sensors of the account are not part of the pipeline.
+    entities = [entity for entity in entities if isinstance(entity, MieleEntity)]
+    for entity in entities:
+        entity.hass = hass
+
+    return entities
+
+
+async def run_fleet(size, ticks):
+    client = StubClient()
+    hass = create_hass(asyncio.get_running_loop())
+
+    fleet = make_fleet(size)
+    client.payload = json.loads(json.dumps(fleet))
+    results = {}
+
+    async def to_dict():
+        _to_dict(fleet)
+
+    await _measure("to_dict", results, to_dict)
+
+    entities = []
+
+    async def setup():
+        # Only the entities of the last run are kept.
+        entities[:] = await setup_entities(hass, client)
+
+    await _measure("setup", results, setup)
+    coordinator = get_coordinator(hass)
+
+    writes = []
+    for _ in range(ticks):
+        advance(fleet)
+        # A poll delivers freshly decoded payloads, not the previous objects.
+        client.payload = json.loads(json.dumps(fleet))
+        STATE_WRITES[0] = 0
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        results.setdefault("tick", []).append(time.perf_counter() - start)
+        writes.append(STATE_WRITES[0])
+
+    tracemalloc.start()
+    try:
+        advance(fleet)
+        client.payload = json.loads(json.dumps(fleet))
+        await coordinator.async_refresh()
+        results["tick.alloc"] = [tracemalloc.get_traced_memory()[1]]
+    finally:
+        tracemalloc.stop()
+
+    async def reads():
+        for entity in entities:
+            entity.state
+            entity.extra_state_attributes
+
+    for _ in range(ticks):
+        await _measure("reads", results, reads)
+
+    return len(entities), results, writes
+
+
+def report(size, entity_count, results, writes):
+    print(
+        "{} devices, {} entities, {:.1f} state writes per tick".format(
+            size, entity_count, statistics.mean(writes) if writes else 0
+        )
+    )
+    print(
+        "  {:<10}{:>12}{:>12}{:>14}".format("stage", "median ms", "max ms", "peak KiB")
+    )
+    for stage in ("to_dict", "setup", "tick", "reads"):
+        timings = results[stage]
+        print(
+            "  {:<10}{:>12.3f}{:>12.3f}{:>14.1f}".format(
+                stage,
+                statistics.median(timings) * 1000,
+                max(timings) * 1000,
+                max(results[stage + ".alloc"]) / 1024,
+            )
+        )
+    print()
+
+
+async def run(sizes, ticks):
+    for size in sizes:
+        entity_count, results, writes = await run_fleet(size, ticks)
+        report(size, entity_count, results, writes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    MieleEntity.async_write_ha_state = _write_ha_state
+    asyncio.run(run(args.sizes, args.ticks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Replay of recorded Miele cloud traffic.
+
+Feeds a recording made with the record_path option back through MieleClient,
+the coordinator and all entities, against a stubbed Home Assistant and the
+local stand-in, at an accelerated pace:
+
+    python tools/miele_replay.py miele.jsonl.gz --speed 1000 --log
+
+Every recorded /v1/devices response is served once and fetched by one
+refresh, with the recorded time between them divided by --speed; --speed 0
+replays as fast as possible. --log prints every entity state change with its
+recorded time. The summary reports the state writes and refresh latency.
+
+With --serve the recording is served by the stand-in on --port instead, at
+the given speed, for a Home Assistant pointed at it with base_url.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from custom_components.miele.entity import MieleEntity  # noqa: E402
+from custom_components.miele.miele_at_home import MieleClient  # noqa: E402
+from custom_components.miele.traffic import read_traffic  # noqa: E402
+from miele_benchmark import create_hass, get_coordinator, setup_entities  # noqa: E402
+from miele_standin import create_app  # noqa: E402
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ReplayOAuth(object):
+    """Token source for the stand-in, which accepts any token."""
+
+    async def async_get_access_token(self):
+        return "replay"
+
+    async def refresh_token(self, hass, rejected_token=None):
+        return True
+
+
+class StateLog(object):
+    """Counts state writes and remembers the last state of every entity."""
+
+    def __init__(self, verbose):
+        self.verbose = verbose
+        self.offset = 0
+        self.writes = 0
+        self.changes = 0
+        self._states = {}
+
+    def write(self, entity):
+        self.writes += 1
+        state = entity.state
+        entity.extra_state_attributes
+        if self._states.get(entity.unique_id, state) != state:
+            self.changes += 1
+            if self.verbose:
+                print(
+                    "+{} {} {!r} -> {!r}".format(
+                        _format_offset(self.offset),
+                        entity.unique_id,
+                        self._states[entity.unique_id],
+                        state,
+                    )
+                )
+        self._states[entity.unique_id] = state
+
+
+def _format_offset(seconds):
+    seconds = int(seconds)
+    return "{:02d}:{:02d}:{:02d}".format(
+        seconds // 3600, seconds % 3600 // 60, seconds % 60
+    )
+
+
+def _devices_records(path):
+    return [
+        (timestamp, payload)
+        for timestamp, kind, payload in read_traffic(path)
+        if kind == "devices"
+    ]
+
+
+async def _wait_until(start, offset, speed):
+    if speed > 0:
+        delay = offset / speed - (time.monotonic() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _start_standin(port):
+    app = create_app(any_token=True)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    return app, runner
+
+
+async def replay(path, speed, verbose):
+    records = _devices_records(path)
+    if not records:
+        print("No /v1/devices responses in {}".format(path))
+        return
+
+    app, runner = await _start_standin(0)
+    port = runner.addresses[0][1]
+    log = StateLog(verbose)
+    MieleEntity.async_write_ha_state = lambda entity: log.write(entity)
+
+    try:
+        async with aiohttp.ClientSession() as websession:
+            first = records[0][0]
+            cloud = app["cloud"]
+            cloud.replace_devices(records[0][1])
+
+            hass = create_hass(asyncio.get_running_loop())
+            client = MieleClient(
+                hass, ReplayOAuth(), websession, "http://127.0.0.1:{}".format(port)
+            )
+            entities = await setup_entities(hass, client)
+            coordinator = get_coordinator(hass)
+
+            refreshes = []
+            start = time.monotonic()
+            for timestamp, devices in records[1:]:
+                log.offset = timestamp - first
+                await _wait_until(start, log.offset, speed)
+                cloud.replace_devices(devices)
+                refresh_start = time.perf_counter()
+                await coordinator.async_refresh()
+                refreshes.append(time.perf_counter() - refresh_start)
+            elapsed = time.monotonic() - start
+    finally:
+        await runner.cleanup()
+
+    duration = records[-1][0] - first
+    print(
+        "{} responses covering {}, replayed in {:.1f}s ({:.0f}x)".format(
+            len(records),
+            _format_offset(duration),
+            elapsed,
+            duration / elapsed if elapsed else 0,
+        )
+    )
+    print(
+        "{} entities, {} state writes, {} state changes".format(
+            len(entities), log.writes, log.changes
+        )
+    )
+    if refreshes:
+        print(
+            "refresh median {:.2f}ms, max {:.2f}ms".format(
+                statistics.median(refreshes) * 1000, max(refreshes) * 1000
+            )
+        )
+
+
+async def serve(path, speed, port):
+    records = _devices_records(path)
+    app, runner = await _start_standin(port)
+    cloud = app["cloud"]
+    _LOGGER.info("Serving %s responses on port %s", len(records), port)
+    try:
+        start = time.monotonic()
+        for timestamp, devices in records:
+            await _wait_until(start, timestamp - records[0][0], speed)
+            cloud.replace_devices(devices)
+            await cloud.notify()
+        _LOGGER.info("Replay finished, serving the last response")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recording", help="file written by the record_path option")
+    parser.add_argument(
+        "--speed", type=float, default=100, help="time acceleration, 0 for no waits"
+    )
+    parser.add_argument("--log", action="store_true", help="print state changes")
+    parser.add_argument(
+        "--serve", action="store_true", help="serve the recording to Home Assistant"
+    )
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.serve else logging.WARNING)
+    if args.serve:
+        asyncio.run(serve(args.recording, args.speed, args.port))
+    else:
+        asyncio.run(replay(args.recording, args.speed, args.log))
+
+
+if __name__ == "__main__":
+    main()
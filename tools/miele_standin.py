@@ -0,0 +1,638 @@
+"""
+Local stand-in for the Miele cloud.
+
+Implements the parts of the Miele third party API the integration uses, so
+polling, push, token refresh and commands can be exercised without a Miele
+account:
+
+    python tools/miele_standin.py devices.json --port 8080
+
+and enter http://127.0.0.1:8080 as the address of the Miele cloud when
+adding the integration.
+
+The OAuth library refuses plain http, so Home Assistant has to run with
+OAUTHLIB_INSECURE_TRANSPORT=1 when it talks to the stand-in.
+
+devices.json is either an object in the /v1/devices format, keyed by
+fabNumber, or an object with such "devices" and "scripts", a list of steps
+per fabNumber that the appliance runs through in a loop:
+
+    {"devices": {...}, "scripts": {"000000000001": [
+        {"duration": 30, "state": {"status": {"value_raw": 1, ...}}},
+        {"duration": 600, "running": true, "state": {...}}]}}
+
+While a running step is active, remainingTime and elapsedTime follow the
+running steps of the script. --demo-washer adds a washing machine cycling
+through a program. The devices file is read again when it changes.
+
+Faults are injected with --latency, --error-rate, --unauthorized-rate and
+--malformed-rate, and can be changed at runtime by POSTing the same settings
+as JSON to /standin/faults, e.g. {"error_rate": 0.5}. --rate-limit answers
+/v1 requests beyond the given number per minute with 429 and Retry-After.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import random
+import secrets
+import time
+from collections import deque
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+_LOGGER = logging.getLogger(__name__)
+
+PING_INTERVAL = 5
+TICK_INTERVAL = 1
+
+DEMO_WASHER_ID = "000000000001"
+
+DEFAULT_ACTIONS = {
+    "processAction": [],
+    "light": [],
+    "ambientLight": [],
+    "startTime": [],
+    "ventilationStep": [],
+    "programId": [],
+    "targetTemperature": [],
+    "deviceName": True,
+    "powerOn": False,
+    "powerOff": True,
+    "colors": [],
+    "modes": [],
+}
+
+# Actions that change the state right away, mapped to the state key they set.
+STATE_ACTIONS = {"light": "light", "ventilationStep": "ventilationStep"}
+
+
+def _value(raw, localized):
+    return {"value_raw": raw, "value_localized": localized, "key_localized": ""}
+
+
+def _time(seconds):
+    seconds = max(int(seconds), 0)
+    return [seconds // 3600, seconds % 3600 // 60]
+
+
+def demo_washer():
+    """Return a washing machine and a script running a 4 minute program."""
+    device = {
+        "ident": {
+            "type": _value(1, "Washing machine"),
+            "deviceName": "",
+            "protocolVersion": 4,
+            "deviceIdentLabel": {
+                "fabNumber": DEMO_WASHER_ID,
+                "fabIndex": "64",
+                "techType": "WWV980",
+                "matNumber": "11385640",
+                "swids": [],
+            },
+            "xkmIdentLabel": {"techType": "EK057", "releaseVersion": "08.32"},
+        },
+        "state": {
+            "ProgramID": _value(0, ""),
+            "status": _value(1, "Off"),
+            "programType": _value(0, ""),
+            "programPhase": _value(256, ""),
+            "remainingTime": [0, 0],
+            "startTime": [0, 0],
+            "targetTemperature": [{"value_raw": 4000, "unit": "Celsius"}],
+            "temperature": [],
+            "signalInfo": False,
+            "signalFailure": False,
+            "signalDoor": True,
+            "remoteEnable": {
+                "fullRemoteControl": True,
+                "smartGrid": False,
+                "mobileStart": True,
+            },
+            "light": None,
+            "elapsedTime": [0, 0],
+            "spinningSpeed": {"value_raw": 1200, "value_localized": "1200"},
+            "dryingStep": _value(None, ""),
+            "ventilationStep": _value(None, ""),
+            "plateStep": [],
+            "ecoFeedback": None,
+            "batteryLevel": None,
+        },
+    }
+
+    def running(phase, localized_phase):
+        return {
+            "ProgramID": _value(1, "Cottons"),
+            "status": _value(5, "In use"),
+            "programPhase": _value(phase, localized_phase),
+            "signalDoor": False,
+            "ecoFeedback": {
+                "currentWaterConsumption": {"unit": "l", "value": 10},
+                "currentEnergyConsumption": {"unit": "kWh", "value": 0.4},
+                "energyForecast": 0.5,
+                "waterForecast": 0.3,
+            },
+        }
+
+    script = [
+        {"duration": 30, "state": copy.deepcopy(device["state"])},
+        {"duration": 120, "running": True, "state": running(260, "Main wash")},
+        {"duration": 60, "running": True, "state": running(261, "Rinse")},
+        {"duration": 60, "running": True, "state": running(266, "Spin")},
+        {
+            "duration": 30,
+            "state": {
+                "status": _value(7, "Finished"),
+                "programPhase": _value(268, "Finished"),
+                "signalInfo": True,
+                "ecoFeedback": None,
+            },
+        },
+    ]
+    return device, script
+
+
+class Appliance(object):
+    """
+    An appliance whose state follows an optional script.
+    """
+
+    def __init__(self, device, script=None, now=None):
+        self.device = device
+        self.actions = copy.deepcopy(DEFAULT_ACTIONS)
+        self._script = script or []
+        self._step = 0
+        self._step_started = time.monotonic() if now is None else now
+        if self._script:
+            self._apply(self._script[0])
+
+    @property
+    def device_id(self):
+        return self.device["ident"]["deviceIdentLabel"]["fabNumber"]
+
+    @property
+    def state(self):
+        return self.device["state"]
+
+    def advance(self, now):
+        """Move the script forward, returns whether the state changed."""
+        if not self._script:
+            return False
+
+        changed = False
+        while now - self._step_started >= self._script[self._step]["duration"]:
+            self._step_started += self._script[self._step]["duration"]
+            self._step = (self._step + 1) % len(self._script)
+            self._apply(self._script[self._step])
+            changed = True
+
+        return self._update_times(now) or changed
+
+    def start_program(self, now):
+        """Jump to the first running step of the script."""
+        for index, step in enumerate(self._script):
+            if step.get("running"):
+                self._step = index
+                self._step_started = now
+                self._apply(step)
+                self._update_times(now)
+                return True
+
+        return False
+
+    def _apply(self, step):
+        self.state.update(copy.deepcopy(step["state"]))
+
+    def _update_times(self, now):
+        step = self._script[self._step]
+        elapsed = remaining = 0
+        if step.get("running"):
+            running = [s["duration"] for s in self._script if s.get("running")]
+            done = sum(
+                s["duration"] for s in self._script[: self._step] if s.get("running")
+            )
+            elapsed = done + now - self._step_started
+            remaining = sum(running) - elapsed
+
+        times = {"elapsedTime": _time(elapsed), "remainingTime": _time(remaining)}
+        if all(self.state.get(key) == value for key, value in times.items()):
+            return False
+
+        self.state.update(times)
+        return True
+
+
+class CloudState(object):
+    """
+    Appliances, issued tokens and the event feed shared by all handlers.
+    """
+
+    def __init__(self, devices_path, demo_washer, token_lifetime, any_token):
+        self._devices_path = devices_path
+        self._devices_mtime = None
+        self._demo_washer = demo_washer
+        self.token_lifetime = token_lifetime
+        self.any_token = any_token
+        self.appliances = {}
+        self.access_tokens = {}
+        self.refresh_tokens = set()
+        self.event_id = 0
+        self.changed = asyncio.Condition()
+        self.load()
+
+    def load(self):
+        """Read the devices file if it changed, returns whether it was read."""
+        appliances = {}
+        now = time.monotonic()
+        if self._devices_path:
+            mtime = os.path.getmtime(self._devices_path)
+            if mtime == self._devices_mtime:
+                return False
+
+            self._devices_mtime = mtime
+            with open(self._devices_path) as f:
+                content = json.load(f)
+            if "devices" in content and "scripts" in content:
+                devices, scripts = content["devices"], content["scripts"]
+            else:
+                devices, scripts = content, {}
+            for device_id, device in devices.items():
+                appliances[device_id] = Appliance(device, scripts.get(device_id), now)
+        elif self.appliances or not self._demo_washer:
+            return False
+
+        if self._demo_washer:
+            device, script = demo_washer()
+            appliances[DEMO_WASHER_ID] = self.appliances.get(
+                DEMO_WASHER_ID
+            ) or Appliance(device, script, now)
+
+        self.appliances = appliances
+        return True
+
+    def replace_devices(self, devices):
+        """Serve devices, e.g. from a recording, keeping known appliances."""
+        appliances = {}
+        for device_id, device in devices.items():
+            appliance = self.appliances.get(device_id) or Appliance(device)
+            appliance.device = device
+            appliances[device_id] = appliance
+        self.appliances = appliances
+
+    def devices(self):
+        return {
+            device_id: appliance.device
+            for device_id, appliance in self.appliances.items()
+        }
+
+    def actions(self):
+        return {
+            device_id: appliance.actions
+            for device_id, appliance in self.appliances.items()
+        }
+
+    def issue_token(self):
+        access_token = secrets.token_hex(16)
+        refresh_token = secrets.token_hex(16)
+        self.access_tokens[access_token] = time.time() + self.token_lifetime
+        self.refresh_tokens.add(refresh_token)
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "Bearer",
+            "expires_in": self.token_lifetime,
+        }
+
+    def authorized(self, request):
+        scheme, _, access_token = request.headers.get("Authorization", "").partition(
+            " "
+        )
+        if scheme != "Bearer" or not access_token:
+            return False
+        if self.any_token:
+            return True
+        return self.access_tokens.get(access_token, 0) > time.time()
+
+    async def notify(self):
+        self.event_id += 1
+        async with self.changed:
+            self.changed.notify_all()
+
+
+@web.middleware
+async def fault_middleware(request, handler):
+    """Delay requests and answer some of them with an injected failure.
+
+    Injected 401s and malformed payloads only hit the /v1 API.
+    """
+    if request.path.startswith("/standin/"):
+        return await handler(request)
+
+    faults = request.app["faults"]
+    if faults["latency"]:
+        await asyncio.sleep(faults["latency"] * random.uniform(0.5, 1.5))
+
+    roll = random.random()
+    if roll < faults["error_rate"]:
+        _LOGGER.info("Injecting 503 for %s", request.path)
+        return web.json_response({"message": "Injected failure"}, status=503)
+
+    # The token endpoint only fails with errors, as the Miele cloud does.
+    if not request.path.startswith("/v1/"):
+        return await handler(request)
+
+    if faults["rate_limit"]:
+        retry_after = _rate_limit_retry_after(request.app, faults["rate_limit"])
+        if retry_after:
+            _LOGGER.info("Rate limiting %s for %ss", request.path, retry_after)
+            return web.json_response(
+                {"message": "Too many requests"},
+                status=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    roll -= faults["error_rate"]
+    if roll < faults["unauthorized_rate"]:
+        _LOGGER.info("Injecting 401 for %s", request.path)
+        return web.json_response({"message": "Injected unauthorized"}, status=401)
+
+    roll -= faults["unauthorized_rate"]
+    if roll < faults["malformed_rate"] and request.method == "GET":
+        _LOGGER.info("Injecting malformed payload for %s", request.path)
+        return web.Response(text='{"message": "trunc', content_type="application/json")
+
+    return await handler(request)
+
+
+def _rate_limit_retry_after(app, per_minute):
+    """Count a request, returns the seconds to wait if it exceeds the limit."""
+    now = time.monotonic()
+    sent = app["sent"]
+    while sent and sent[0] <= now - 60:
+        sent.popleft()
+    if len(sent) >= per_minute:
+        return int(sent[0] + 60 - now) + 1
+    sent.append(now)
+    return 0
+
+
+@web.middleware
+async def auth_middleware(request, handler):
+    if request.path.startswith("/v1/") and not request.app["cloud"].authorized(request):
+        return web.json_response({"message": "Unauthorized"}, status=401)
+
+    return await handler(request)
+
+
+async def login_handler(request):
+    query = {"code": secrets.token_hex(8), "state": request.query.get("state", "")}
+    location = "{}?{}".format(request.query["redirect_uri"], urlencode(query))
+    raise web.HTTPFound(location)
+
+
+async def token_handler(request):
+    cloud = request.app["cloud"]
+    form = await request.post()
+    grant_type = form.get("grant_type")
+    if grant_type == "refresh_token":
+        refresh_token = form.get("refresh_token")
+        if refresh_token not in cloud.refresh_tokens:
+            return web.json_response({"error": "invalid_grant"}, status=400)
+        cloud.refresh_tokens.discard(refresh_token)
+    elif grant_type != "authorization_code":
+        return web.json_response({"error": "unsupported_grant_type"}, status=400)
+
+    _LOGGER.info("Issuing token for %s grant", grant_type)
+    return web.json_response(cloud.issue_token())
+
+
+def _appliance(request):
+    appliance = request.app["cloud"].appliances.get(request.match_info["device_id"])
+    if appliance is None:
+        raise web.HTTPNotFound()
+    return appliance
+
+
+async def devices_handler(request):
+    return web.json_response(request.app["cloud"].devices())
+
+
+async def device_handler(request):
+    return web.json_response(_appliance(request).device)
+
+
+async def state_handler(request):
+    return web.json_response(_appliance(request).state)
+
+
+async def get_actions_handler(request):
+    return web.json_response(_appliance(request).actions)
+
+
+async def put_actions_handler(request):
+    appliance = _appliance(request)
+    body = await request.json()
+    _LOGGER.info("Action for %s: %s", appliance.device_id, body)
+    for key, state_key in STATE_ACTIONS.items():
+        if key in body:
+            appliance.state[state_key] = body[key]
+    if body.get("powerOff"):
+        appliance.state["status"] = _value(1, "Off")
+    elif body.get("powerOn"):
+        appliance.state["status"] = _value(2, "On")
+
+    await request.app["cloud"].notify()
+    return web.Response(status=204)
+
+
+async def get_programs_handler(request):
+    _appliance(request)
+    return web.json_response(
+        [
+            {"programId": 1, "program": "Cottons"},
+            {"programId": 3, "program": "Minimum iron"},
+            {"programId": 4, "program": "Delicates"},
+            {"programId": 8, "program": "Woollens"},
+        ]
+    )
+
+
+async def put_programs_handler(request):
+    appliance = _appliance(request)
+    body = await request.json()
+    _LOGGER.info("Program for %s: %s", appliance.device_id, body)
+    if not appliance.start_program(time.monotonic()):
+        return web.json_response({"message": "No program available"}, status=400)
+
+    await request.app["cloud"].notify()
+    return web.Response(status=204)
+
+
+async def _write_event(response, event_id, event_type, payload):
+    await response.write(
+        "id: {}\nevent: {}\ndata: {}\n\n".format(
+            event_id, event_type, json.dumps(payload)
+        ).encode("utf-8")
+    )
+
+
+async def events_handler(request):
+    cloud = request.app["cloud"]
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    _LOGGER.info(
+        "Client connected, last event %s", request.headers.get("Last-Event-ID")
+    )
+
+    try:
+        await _write_event(response, cloud.event_id, "devices", cloud.devices())
+        await _write_event(response, cloud.event_id, "actions", cloud.actions())
+        while True:
+            event_id = cloud.event_id
+            async with cloud.changed:
+                try:
+                    await asyncio.wait_for(cloud.changed.wait(), PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+            if cloud.event_id != event_id:
+                await _write_event(response, cloud.event_id, "devices", cloud.devices())
+                await _write_event(response, cloud.event_id, "actions", cloud.actions())
+            else:
+                await response.write(b"event: ping\ndata: ping\n\n")
+    except ConnectionResetError:
+        _LOGGER.info("Client disconnected")
+
+    return response
+
+
+async def faults_handler(request):
+    faults = request.app["faults"]
+    if request.method == "POST":
+        update = await request.json()
+        unknown = update.keys() - faults.keys()
+        if unknown:
+            return web.json_response(
+                {"message": "Unknown faults {}".format(sorted(unknown))}, status=400
+            )
+        faults.update(update)
+        _LOGGER.info("Faults set to %s", faults)
+
+    return web.json_response(faults)
+
+
+async def _run_appliances(app):
+    cloud = app["cloud"]
+    while True:
+        await asyncio.sleep(TICK_INTERVAL)
+        changed = False
+        try:
+            changed = cloud.load()
+        except (IOError, ValueError) as err:
+            _LOGGER.warning("Could not read devices file: %s", err)
+
+        now = time.monotonic()
+        for appliance in cloud.appliances.values():
+            changed = appliance.advance(now) or changed
+
+        if changed:
+            await cloud.notify()
+
+
+async def _start_appliances(app):
+    app["appliance_task"] = asyncio.create_task(_run_appliances(app))
+
+
+async def _stop_appliances(app):
+    app["appliance_task"].cancel()
+
+
+def create_app(
+    devices_path=None,
+    demo_washer=False,
+    token_lifetime=3600,
+    any_token=False,
+    latency=0,
+    error_rate=0,
+    unauthorized_rate=0,
+    malformed_rate=0,
+    rate_limit=0,
+):
+    app = web.Application(middlewares=[fault_middleware, auth_middleware])
+    app["cloud"] = CloudState(devices_path, demo_washer, token_lifetime, any_token)
+    app["faults"] = {
+        "latency": latency,
+        "error_rate": error_rate,
+        "unauthorized_rate": unauthorized_rate,
+        "malformed_rate": malformed_rate,
+        "rate_limit": rate_limit,
+    }
+    app["sent"] = deque()
+    app.router.add_get("/thirdparty/login", login_handler)
+    app.router.add_post("/thirdparty/token", token_handler)
+    app.router.add_get("/v1/devices", devices_handler)
+    app.router.add_get("/v1/devices/all/events", events_handler)
+    app.router.add_get("/v1/devices/{device_id}", device_handler)
+    app.router.add_get("/v1/devices/{device_id}/state", state_handler)
+    app.router.add_get("/v1/devices/{device_id}/actions", get_actions_handler)
+    app.router.add_put("/v1/devices/{device_id}/actions", put_actions_handler)
+    app.router.add_get("/v1/devices/{device_id}/programs", get_programs_handler)
+    app.router.add_put("/v1/devices/{device_id}/programs", put_programs_handler)
+    app.router.add_route("*", "/standin/faults", faults_handler)
+    app.on_startup.append(_start_appliances)
+    app.on_cleanup.append(_stop_appliances)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "devices", nargs="?", help="JSON file in the /v1/devices format"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--demo-washer", action="store_true", help="add a scripted washing machine"
+    )
+    parser.add_argument(
+        "--token-lifetime", type=int, default=3600, help="seconds until tokens expire"
+    )
+    parser.add_argument(
+        "--any-token", action="store_true", help="accept any bearer token"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="average delay of responses in s"
+    )
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0)
+    parser.add_argument("--malformed-rate", type=float, default=0)
+    parser.add_argument(
+        "--rate-limit", type=int, default=0, help="/v1 requests allowed per minute"
+    )
+    args = parser.parse_args()
+    if args.devices is None and not args.demo_washer:
+        parser.error("a devices file or --demo-washer is required")
+
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(
+        create_app(
+            args.devices,
+            args.demo_washer,
+            args.token_lifetime,
+            args.any_token,
+            args.latency,
+            args.error_rate,
+            args.unauthorized_rate,
+            args.malformed_rate,
+            args.rate_limit,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()